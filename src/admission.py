@@ -0,0 +1,117 @@
+"""
+Admission control for TalentScout AI
+Token-bucket limits per session and per client address, plus a global ceiling
+on in-flight generations, so one client cannot starve everyone else's LLM capacity.
+The ceiling is enforced by the job queue when a generation is submitted, where
+the check and the reservation happen under one lock
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from config import (
+    ADMISSION_SESSION_RATE, ADMISSION_SESSION_BURST,
+    ADMISSION_CLIENT_RATE, ADMISSION_CLIENT_BURST,
+    ADMISSION_CAPACITY_RETRY_SECONDS,
+    ADMISSION_MAX_TRACKED_BUCKETS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def retry_after(self, cost: float = 1.0) -> float:
+        """Seconds until `cost` tokens are available (0 if they already are)"""
+        missing = cost - self.tokens
+        return max(0.0, missing / self.rate) if self.rate > 0 else float("inf")
+
+    def consume(self, cost: float = 1.0) -> None:
+        self.tokens -= cost
+
+    def idle(self, now: float) -> bool:
+        """Whether the bucket is full again, i.e. safe to forget"""
+        return self.tokens + (now - self.updated_at) * self.rate >= self.burst
+
+
+class CapacityExceeded(Exception):
+    """Raised when the global ceiling on in-flight generations has been reached"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Generation capacity reached, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Decides whether a request may proceed and keeps rejection metrics"""
+
+    def __init__(self):
+        self._session_buckets: Dict[str, TokenBucket] = {}
+        self._client_buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.metrics = Counter()
+
+    def _bucket(self, buckets: Dict[str, TokenBucket], key: str, rate: float, burst: int,
+                now: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= ADMISSION_MAX_TRACKED_BUCKETS:
+                for idle_key in [k for k, b in buckets.items() if b.idle(now)]:
+                    del buckets[idle_key]
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        bucket.refill(now)
+        return bucket
+
+    def admit(self, session_token: str, client_address: str) -> Optional[float]:
+        """Admit a request, or return the number of seconds to wait before retrying
+
+        Tokens are only taken when every limit passes, so a request rejected
+        by one limit does not drain the others.
+        """
+        now = time.monotonic()
+        with self._lock:
+            session_bucket = self._bucket(
+                self._session_buckets, session_token,
+                ADMISSION_SESSION_RATE, ADMISSION_SESSION_BURST, now
+            )
+            client_bucket = self._bucket(
+                self._client_buckets, client_address or "unknown",
+                ADMISSION_CLIENT_RATE, ADMISSION_CLIENT_BURST, now
+            )
+
+            if session_bucket.retry_after() > 0:
+                return self._reject("session", session_token[:8], session_bucket.retry_after())
+            if client_bucket.retry_after() > 0:
+                return self._reject("client", client_address, client_bucket.retry_after())
+
+            session_bucket.consume()
+            client_bucket.consume()
+            self.metrics["admitted"] += 1
+            return None
+
+    def reject_capacity(self, session_token: str) -> CapacityExceeded:
+        """Count a generation refused by the in-flight ceiling and build the error to raise"""
+        with self._lock:
+            return CapacityExceeded(self._reject("capacity", session_token[:8], ADMISSION_CAPACITY_RETRY_SECONDS))
+
+    def _reject(self, reason: str, key: str, retry_after: float) -> float:
+        self.metrics[f"rejected_{reason}"] += 1
+        logger.warning("admission_rejected reason=%s key=%s retry_after=%.1fs", reason, key, retry_after)
+        return retry_after
+
+
+admission_controller = AdmissionController()
@@ -1,7 +1,25 @@
 import streamlit as st
 import os
+import logging
+import copy
+import functools
+import math
+import time
 from dotenv import load_dotenv
-from prompts import generate_tech_questions, generate_behavioral_questions
+from prompts import generate_tech_questions, generate_behavioral_questions, extract_profile_fields, AUTO_MODEL
+from config import (
+    PROFILE_TURNS, ADMIN_CONTROLS, PROFILE_QUERY_PARAM, RESUME_MAX_BYTES,
+    JOB_POLL_INTERVAL_SECONDS, ADMISSION_TRUSTED_PROXIES
+)
+from profiling import profile_job, profile_turn
+from resume import ingest_resume
+from chat_flow import (
+    process_user_input, generate_questions,
+    apply_generated_questions, build_generation_error_response
+)
+from jobs import job_queue
+from admission import CapacityExceeded, admission_controller
+from transcripts import recorder as transcript_recorder
 from utils.helpers import validate_tech_stack, sanitize_input, get_difficulty_description
 from conversation import (
     ConversationManager, ConversationState, CandidateProfile,
@@ -11,6 +29,9 @@ from conversation import (
 # Load environment variables
 load_dotenv()
 
+# Surface model routing decisions and outcomes in the dyno logs
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
 # Page configuration
 st.set_page_config(
     page_title="TalentScout AI Chatbot", 
@@ -22,6 +43,14 @@ st.set_page_config(
 conv_manager = ConversationManager()
 conv_manager.initialize_session()
 
+# Profile this script run on demand; nothing is sampled when the hook is off
+# The query param and sidebar toggle only count when admin controls are enabled
+if PROFILE_TURNS or (ADMIN_CONTROLS and (
+        st.query_params.get(PROFILE_QUERY_PARAM) == "1" or st.session_state.get("profile_turns", False))):
+    turn_profiler = profile_turn(st.session_state.session_token, st.session_state.conversation_state.value)
+else:
+    turn_profiler = None
+
 # Main title
 st.title("🤖 TalentScout AI Chatbot")
 st.markdown("**Your AI-powered interview preparation assistant**")
@@ -43,11 +72,13 @@ with st.sidebar:
     ]
     DEFAULT_MODEL = "llama-3.3-70b-versatile"
     
+    model_options = ALTERNATIVE_MODELS + [AUTO_MODEL]
     selected_model = st.selectbox(
         "🤖 AI Model",
-        ALTERNATIVE_MODELS,
-        index=ALTERNATIVE_MODELS.index(DEFAULT_MODEL),
-        help="Choose the AI model for question generation"
+        model_options,
+        index=model_options.index(DEFAULT_MODEL),
+        format_func=lambda m: "⚡ Auto (cost/latency routing)" if m == AUTO_MODEL else m,
+        help="Choose the AI model for question generation, or let Auto pick one per request"
     )
     
     # Conversation controls
@@ -55,18 +86,26 @@ with st.sidebar:
     
     if st.button("🆕 Start New Conversation", use_container_width=True):
         # Reset all session state
+        job_queue.cancel_session(st.session_state.session_token)
+        conv_manager.clear_session()
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         conv_manager.initialize_session()
         st.rerun()
     
     if st.button("🔄 Reset Current Step", use_container_width=True):
+        turn = transcript_recorder.start_turn(st.session_state, "", action="reset_step")
         if st.session_state.conversation_state == ConversationState.GREETING:
             st.session_state.conversation_state = ConversationState.GREETING
         elif st.session_state.conversation_state == ConversationState.COLLECTING_INFO:
             st.session_state.candidate_profile = CandidateProfile()
         elif st.session_state.conversation_state == ConversationState.TECH_STACK_INPUT:
             st.session_state.candidate_profile.tech_stack = []
+        elif st.session_state.conversation_state == ConversationState.GENERATING_QUESTIONS:
+            job_queue.cancel_session(st.session_state.session_token)
+            st.session_state.conversation_state = ConversationState.FOLLOW_UP
+        transcript_recorder.finish_turn(turn, "")
+        conv_manager.persist_session()
         st.rerun()
     
     # Show conversation state
@@ -82,6 +121,21 @@ with st.sidebar:
     current_state_name = state_names.get(st.session_state.conversation_state, "Unknown")
     st.info(f"**State:** {current_state_name}")
     
+    if ADMIN_CONTROLS:
+        st.markdown("### 🛠️ Admin")
+        st.checkbox(
+            "Profile each turn",
+            key="profile_turns",
+            help="Write a collapsed-stack flamegraph file per script run"
+        )
+        metrics = admission_controller.metrics
+        st.write(f"**Admitted:** {metrics['admitted']}")
+        st.write(
+            f"**Rejected:** session {metrics['rejected_session']} • "
+            f"client {metrics['rejected_client']} • capacity {metrics['rejected_capacity']}"
+        )
+        st.write(f"**In-flight generations:** {job_queue.in_flight_count()}")
+    
     st.markdown("### About TalentScout AI")
     st.info("AI-powered conversational interview question generator using Groq's fast inference.")
     
@@ -91,18 +145,111 @@ with st.sidebar:
     st.write("• Say 'bye' or 'done' to end conversation")
     st.write("• Use 'help' if you need guidance")
 
+def submit_generation(question_types, turn):
+    """Queue question generation as a background job for the current session
+    
+    The job's outcome is recorded as its own transcript action when it is applied.
+    """
+    profile = st.session_state.candidate_profile
+    job_key = (tuple(question_types), profile.position, profile.experience,
+               tuple(profile.tech_stack), selected_model)
+    job_turn = transcript_recorder.start_turn(st.session_state, "", action="generation_complete")
+    
+    # A profiled run carries its profiler into the job and the workers it fans out to
+    job_fn = generate_questions
+    if turn_profiler is not None:
+        job_fn = profile_job(turn_profiler.tag, generate_questions)
+    
+    # Technical questions from a fanned-out stack show up here as each group finishes
+    partial_questions = []
+    try:
+        job_id = job_queue.submit(
+            st.session_state.session_token,
+            job_key,
+            job_fn,
+            copy.deepcopy(profile),
+            question_types,
+            selected_model,
+            job_turn.wrap("technical", functools.partial(generate_tech_questions, on_partial=partial_questions.extend)),
+            job_turn.wrap("behavioral", generate_behavioral_questions),
+            context={"turn": job_turn, "partial": partial_questions}
+        )
+    except CapacityExceeded as e:
+        turn.generation = {"status": "rejected", "retry_after": e.retry_after}
+        raise
+    turn.generation = {"status": "started"}
+    st.session_state.generation_job_id = job_id
+
+def apply_generation_result(job):
+    """Move a finished job's questions into the conversation"""
+    job_queue.consume(job)
+    st.session_state.pop("generation_job_id", None)
+    
+    try:
+        response = apply_generated_questions(st.session_state, job.future.result())
+    except Exception as e:
+        st.session_state.conversation_state = ConversationState.FOLLOW_UP
+        response = build_generation_error_response(e)
+    
+    st.session_state.conversation_history.append({
+        "role": "assistant",
+        "content": response
+    })
+    transcript_recorder.finish_turn(job.context["turn"], response)
+    conv_manager.persist_session()
+
+@st.fragment(run_every=JOB_POLL_INTERVAL_SECONDS)
+def render_generation_progress(job_id):
+    """Poll a background generation job without blocking the chat"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return
+    
+    if not job.done:
+        elapsed = int(time.time() - job.created_at)
+        st.info(f"⏳ Generating your questions... ({elapsed}s)")
+        partial_questions = list(job.context.get("partial", []))
+        if partial_questions:
+            st.markdown("**First questions ready:**")
+            for question in partial_questions:
+                st.write(f"• {question}")
+        return
+    
+    apply_generation_result(job)
+    st.rerun()
+
 # Main conversation area
 col1, col2 = st.columns([2, 1])
 
 with col1:
     st.markdown("### 💬 Conversation")
     
+    # Restore persisted history lazily, only when it is about to be rendered
+    conv_manager.ensure_history_loaded()
+    
     # Display conversation history
     if st.session_state.conversation_history:
         with st.container():
             for message in st.session_state.conversation_history[-10:]:  # Show last 10 messages
                 format_conversation_message(message["role"], message["content"])
     
+    # Jobs live in the process-wide queue, so a refreshed page finds its job by session token
+    generation_job = job_queue.get(st.session_state.get("generation_job_id")) or \
+        job_queue.session_job(st.session_state.session_token)
+    if generation_job is not None:
+        render_generation_progress(generation_job.job_id)
+    elif st.session_state.conversation_state == ConversationState.GENERATING_QUESTIONS:
+        # The job is gone (cancelled after the page was left, or the server restarted)
+        turn = transcript_recorder.start_turn(st.session_state, "", action="generation_interrupted")
+        st.session_state.conversation_state = ConversationState.FOLLOW_UP
+        response = "⚠️ **Question generation was interrupted.**\n\n" + \
+            conv_manager.get_conversation_prompt(ConversationState.FOLLOW_UP)
+        st.session_state.conversation_history.append({
+            "role": "assistant",
+            "content": response
+        })
+        transcript_recorder.finish_turn(turn, response)
+    
     # Get current conversation prompt
     current_prompt = conv_manager.get_conversation_prompt(st.session_state.conversation_state)
     
@@ -148,6 +295,78 @@ with col2:
         st.write("**Behavioral:** STAR method, leadership, problem-solving")
         st.write("**Both:** Complete interview preparation")
 
+def client_address():
+    """Client address as seen by the nearest trusted proxy
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so only the last ADMISSION_TRUSTED_PROXIES hops can be
+    trusted; anything to their left is supplied by the client.
+    """
+    hops = [hop.strip() for hop in st.context.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+    if ADMISSION_TRUSTED_PROXIES and hops:
+        return hops[-min(ADMISSION_TRUSTED_PROXIES, len(hops))]
+    return getattr(st.context, "ip_address", None) or "unknown"
+
+def admission_warning(retry_after):
+    st.warning(
+        f"⏳ **Too many requests right now.** Please try again in {math.ceil(retry_after)} seconds."
+    )
+
+# Resume import: fills the whole profile in one turn
+if st.session_state.conversation_state in (
+    ConversationState.GREETING, ConversationState.COLLECTING_INFO, ConversationState.TECH_STACK_INPUT
+):
+    with st.expander("📄 Have a resume? Paste or upload it to skip the questions"):
+        with st.form("resume_form", clear_on_submit=True):
+            resume_text = st.text_area(
+                "Paste your resume:",
+                max_chars=RESUME_MAX_BYTES,
+                height=150
+            )
+            resume_file = st.file_uploader("...or upload a text/markdown file", type=["txt", "md"])
+            import_resume = st.form_submit_button("Import Resume 📄", use_container_width=True)
+    
+        if import_resume and (resume_file is not None or resume_text.strip()):
+            resume_retry_after = admission_controller.admit(st.session_state.session_token, client_address())
+            if resume_retry_after is not None:
+                admission_warning(resume_retry_after)
+            elif resume_file is not None and resume_file.size > RESUME_MAX_BYTES:
+                st.error(f"Resume is too large. Please keep it under {RESUME_MAX_BYTES // 1024} KB.")
+            else:
+                source = resume_file if resume_file is not None else resume_text
+                # The resume text itself is not logged; replay applies the recorded outcome
+                turn = transcript_recorder.start_turn(st.session_state, "", action="resume_import")
+                profile, issues = ingest_resume(source, st.session_state.candidate_profile)
+                st.session_state.candidate_profile = profile
+                
+                st.session_state.conversation_history.append({
+                    "role": "user",
+                    "content": f"📄 Imported resume ({resume_file.name if resume_file is not None else 'pasted text'})"
+                })
+                
+                response = "Thanks! Here's what I picked up from your resume:\n\n"
+                if profile.tech_stack:
+                    response += f"**Technologies:** {', '.join(profile.tech_stack)}\n\n"
+                
+                if issues:
+                    st.session_state.conversation_state = ConversationState.COLLECTING_INFO
+                    response += f"**Still needed:** {', '.join(issues)}\n\n"
+                    response += conv_manager.get_conversation_prompt(ConversationState.COLLECTING_INFO)
+                elif profile.tech_stack:
+                    st.session_state.conversation_state = ConversationState.FOLLOW_UP
+                    response += conv_manager.get_conversation_prompt(ConversationState.FOLLOW_UP)
+                else:
+                    st.session_state.conversation_state = ConversationState.TECH_STACK_INPUT
+                    response += conv_manager.get_conversation_prompt(ConversationState.TECH_STACK_INPUT)
+                
+                st.session_state.conversation_history.append({
+                    "role": "assistant",
+                    "content": response
+                })
+                transcript_recorder.finish_turn(turn, response)
+                conv_manager.persist_session()
+                st.rerun()
+
 # User input area
 with st.form("chat_form", clear_on_submit=True):
     user_input = st.text_input(
@@ -168,157 +387,36 @@ with st.form("chat_form", clear_on_submit=True):
         user_input = "help"
         submit = True
 
-# Process user input
+# Admission control runs before any input processing or LLM work
+retry_after = None
 if submit and user_input.strip():
-    # Add user message to history
-    st.session_state.conversation_history.append({
-        "role": "user",
-        "content": user_input
-    })
+    retry_after = admission_controller.admit(st.session_state.session_token, client_address())
+    if retry_after is not None:
+        admission_warning(retry_after)
+
+# Process user input
+if submit and user_input.strip() and retry_after is None:
+    turn = transcript_recorder.start_turn(st.session_state, user_input)
     
-    # Check for conversation ending
     if conv_manager.detect_conversation_ending(user_input):
-        st.session_state.conversation_state = ConversationState.ENDING
-        response = conv_manager.get_conversation_prompt(ConversationState.ENDING)
-        
-        st.session_state.conversation_history.append({
-            "role": "assistant",
-            "content": response
-        })
-        st.rerun()
-    
-    # Process based on current state
-    if st.session_state.conversation_state == ConversationState.GREETING:
-        # Parse initial information
-        profile, issues = conv_manager.parse_user_info(user_input, st.session_state.candidate_profile)
-        st.session_state.candidate_profile = profile
-        
-        if not issues:
-            # All basic info collected, move to tech stack
-            st.session_state.conversation_state = ConversationState.TECH_STACK_INPUT
-            response = conv_manager.get_conversation_prompt(ConversationState.TECH_STACK_INPUT)
-        else:
-            # Need more information
-            st.session_state.conversation_state = ConversationState.COLLECTING_INFO
-            response = conv_manager.get_conversation_prompt(ConversationState.COLLECTING_INFO)
-            response += f"\n\n**Still needed:** {', '.join(issues)}"
-    
-    elif st.session_state.conversation_state == ConversationState.COLLECTING_INFO:
-        # Continue collecting missing information
-        profile, issues = conv_manager.parse_user_info(user_input, st.session_state.candidate_profile)
-        st.session_state.candidate_profile = profile
-        
-        if not issues:
-            st.session_state.conversation_state = ConversationState.TECH_STACK_INPUT
-            response = conv_manager.get_conversation_prompt(ConversationState.TECH_STACK_INPUT)
-        else:
-            response = f"Great! I got some information. **Still needed:** {', '.join(issues)}\n\n"
-            response += conv_manager.get_conversation_prompt(ConversationState.COLLECTING_INFO)
-    
-    elif st.session_state.conversation_state == ConversationState.TECH_STACK_INPUT:
-        # Extract technologies
-        techs = conv_manager.extract_tech_stack(user_input)
-        
-        if techs:
-            st.session_state.candidate_profile.tech_stack = techs
-            st.session_state.conversation_state = ConversationState.FOLLOW_UP
-            response = f"Excellent! I found these technologies: **{', '.join(techs)}**\n\n"
-            response += conv_manager.get_conversation_prompt(ConversationState.FOLLOW_UP)
-        else:
-            response = "I couldn't identify specific technologies from your input. "
-            response += conv_manager.get_conversation_prompt(ConversationState.TECH_STACK_INPUT)
-    
-    elif st.session_state.conversation_state == ConversationState.FOLLOW_UP:
-        # Determine question type and generate
-        user_input_lower = user_input.lower()
-        
-        with st.spinner("🤖 Generating your personalized interview questions..."):
-            try:
-                questions_generated = []
-                
-                if any(word in user_input_lower for word in ['technical', 'tech', 'coding', 'programming']):
-                    # Generate technical questions
-                    tech_questions = generate_tech_questions(
-                        ", ".join(st.session_state.candidate_profile.tech_stack),
-                        st.session_state.candidate_profile.position,
-                        st.session_state.candidate_profile.experience,
-                        selected_model
-                    )
-                    
-                    for q in tech_questions:
-                        if q.strip():
-                            questions_generated.append({"type": "Technical", "question": q.strip()})
-                
-                elif any(word in user_input_lower for word in ['behavioral', 'behaviour', 'soft', 'experience']):
-                    # Generate behavioral questions
-                    behavioral_questions = generate_behavioral_questions(
-                        st.session_state.candidate_profile.position,
-                        st.session_state.candidate_profile.experience,
-                        selected_model
-                    )
-                    
-                    for q in behavioral_questions:
-                        if q.strip():
-                            questions_generated.append({"type": "Behavioral", "question": q.strip()})
-                
-                else:
-                    # Generate both types
-                    tech_questions = generate_tech_questions(
-                        ", ".join(st.session_state.candidate_profile.tech_stack),
-                        st.session_state.candidate_profile.position,
-                        st.session_state.candidate_profile.experience,
-                        selected_model
-                    )
-                    
-                    behavioral_questions = generate_behavioral_questions(
-                        st.session_state.candidate_profile.position,
-                        st.session_state.candidate_profile.experience,
-                        selected_model
-                    )
-                    
-                    for q in tech_questions:
-                        if q.strip():
-                            questions_generated.append({"type": "Technical", "question": q.strip()})
-                    
-                    for q in behavioral_questions:
-                        if q.strip():
-                            questions_generated.append({"type": "Behavioral", "question": q.strip()})
-                
-                st.session_state.generated_questions = questions_generated
-                st.session_state.conversation_state = ConversationState.ENDING
-                
-                response = f"🎉 **Perfect! I've generated {len(questions_generated)} personalized interview questions for you!**\n\n"
-                response += "**Your questions are now displayed in the sidebar.** ➡️\n\n"
-                response += "**Interview Preparation Tips:**\n"
-                response += "• **Practice STAR method** for behavioral questions (Situation, Task, Action, Result)\n"
-                response += "• **Review fundamental concepts** related to your tech stack\n"
-                response += "• **Prepare specific examples** from your experience\n"
-                response += "• **Research the company** and role requirements\n\n"
-                response += "**Would you like me to:**\n"
-                response += "• Generate more questions for a different role?\n"
-                response += "• Start over with new information?\n"
-                response += "• End this session?\n\n"
-                response += "*Just let me know! Say 'bye' when you're ready to finish.*"
-                
-            except Exception as e:
-                response = f"❌ **I encountered an error generating questions:** {str(e)}\n\n"
-                response += "This might be due to API connectivity. Please check:\n"
-                response += "• Your internet connection\n"
-                response += "• Groq API key configuration\n\n"
-                response += "Would you like to try again or need help with setup?"
-    
-    else:
-        # Fallback response
-        response = conv_manager.generate_fallback_response(user_input, st.session_state.conversation_state)
-    
-    # Add response to history
-    st.session_state.conversation_history.append({
-        "role": "assistant",
-        "content": response
-    })
+        job_queue.cancel_session(st.session_state.session_token)
+
+    # Question generation runs in the background so the chat stays responsive
+    response = process_user_input(
+        conv_manager, st.session_state, user_input, selected_model,
+        turn.wrap("technical", generate_tech_questions),
+        turn.wrap("behavioral", generate_behavioral_questions),
+        turn.wrap("profile", extract_profile_fields),
+        start_generation=functools.partial(submit_generation, turn=turn)
+    )
+    transcript_recorder.finish_turn(turn, response)
     
+    conv_manager.persist_session()
     st.rerun()
 
+# Persist prompts shown during this run
+conv_manager.persist_session()
+
 # Footer
 st.markdown("---")
 st.markdown("**🤖 TalentScout AI Chatbot** • Built with ❤️ using Streamlit and Groq AI • *Natural conversation, personalized questions*")
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Micro-batching for TalentScout AI
+Collects near-simultaneous requests from different sessions and dispatches
+compatible ones together, so a hiring spike costs fewer Groq calls
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, List
+
+
+class _PendingRequest:
+    """A request waiting in a batch for its result"""
+
+    __slots__ = ("payload", "event", "result", "error")
+
+    def __init__(self, payload: Any):
+        self.payload = payload
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Groups requests by key for a short window, then dispatches them together
+
+    `dispatch(key, payloads)` must return one result per payload, in order.
+    A batch is dispatched when its window elapses or it reaches `max_size`,
+    whichever comes first, so no request waits in a batch longer than
+    min(window, max_wait) seconds before its call starts.
+    """
+
+    def __init__(self, dispatch: Callable[[Hashable, List[Any]], List[Any]],
+                 window: float, max_wait: float, max_size: int):
+        self._dispatch = dispatch
+        self._window = min(window, max_wait)
+        self._max_size = max(1, max_size)
+        self._groups: Dict[Hashable, List[_PendingRequest]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, payload: Any) -> Any:
+        """Queue a request and block until its batch has been dispatched"""
+        pending = _PendingRequest(payload)
+
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = []
+                self._groups[key] = group
+                timer = threading.Timer(self._window, self._flush, args=(key, group))
+                timer.daemon = True
+                timer.start()
+            group.append(pending)
+
+            full = len(group) >= self._max_size
+            if full:
+                del self._groups[key]
+
+        if full:
+            self._run(key, group)
+
+        pending.event.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _flush(self, key: Hashable, group: List[_PendingRequest]) -> None:
+        """Dispatch a batch whose window has elapsed, unless it already filled up"""
+        with self._lock:
+            if self._groups.get(key) is not group:
+                return
+            del self._groups[key]
+        self._run(key, group)
+
+    def _run(self, key: Hashable, group: List[_PendingRequest]) -> None:
+        try:
+            results = self._dispatch(key, [pending.payload for pending in group])
+            if len(results) != len(group):
+                raise RuntimeError("Batch dispatch returned the wrong number of results")
+            for pending, result in zip(group, results):
+                pending.result = result
+        except Exception as e:
+            for pending in group:
+                pending.error = e
+        finally:
+            for pending in group:
+                pending.event.set()
@@ -0,0 +1,45 @@
+"""
+Candidate profile model and the text patterns used to fill it for TalentScout AI
+Kept free of UI imports so the chat parser, the resume extractor and offline
+tools can share them
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List
+
+# Common tech keywords and patterns
+TECH_PATTERNS = [
+    re.compile(r'\b(?:python|java|javascript|js|typescript|ts|react|angular|vue|node\.?js|django|flask|fastapi|spring|laravel|php|ruby|rails|go|golang|rust|c\+\+|c#|swift|kotlin|flutter|dart|sql|mysql|postgresql|mongodb|redis|docker|kubernetes|aws|azure|gcp|git|jenkins|terraform|ansible)\b', re.IGNORECASE),
+    re.compile(r'\b(?:html|css|sass|scss|bootstrap|tailwind|jquery|express|nest\.?js|next\.?js|nuxt\.?js|svelte|ember|backbone|d3\.?js|three\.?js|chart\.?js)\b', re.IGNORECASE),
+    re.compile(r'\b(?:machine learning|ml|ai|artificial intelligence|data science|pandas|numpy|scipy|scikit-learn|tensorflow|pytorch|keras|opencv)\b', re.IGNORECASE)
+]
+
+ROLE_KEYWORDS = r'(?:developer|engineer|designer|manager|analyst|scientist|architect|lead|director|consultant|administrator)'
+ROLE_KEYWORD_PATTERN = re.compile(r'\b' + ROLE_KEYWORDS + r'\b', re.IGNORECASE)
+
+# Values a model uses for "not stated" that must never become a profile field
+PLACEHOLDER_VALUES = {"unknown", "n/a", "na", "none", "null", "not stated", "not specified", "not provided", "tbd"}
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# Bounded repeats keep matching linear on long digit or whitespace runs
+EXPERIENCE_PATTERNS = [
+    re.compile(r'(?<!\d)(\d{1,2})\s{0,3}(?:years?|yrs?)\s{0,3}(?:of\s{0,3})?(?:experience|exp)'),
+    re.compile(r'(?:experience|exp)\s{0,3}(?:of\s{0,3})?(?<!\d)(\d{1,2})\s{0,3}(?:years?|yrs?)'),
+    re.compile(r'(?<!\d)(\d{1,2})\s{0,3}(?:years?|yrs?)\s{0,3}(?:in|working|coding|programming)'),
+    re.compile(r'(?:have|with|got)\s{0,3}(?<!\d)(\d{1,2})\s{0,3}(?:years?|yrs?)')
+]
+
+@dataclass
+class CandidateProfile:
+    name: str = ""
+    email: str = ""
+    position: str = ""
+    experience: int = 0
+    tech_stack: List[str] = None
+    question_type: str = ""
+    
+    def __post_init__(self):
+        if self.tech_stack is None:
+            self.tech_stack = []
@@ -0,0 +1,206 @@
+"""
+Conversation state machine for TalentScout AI
+Advances the conversation by one user message, independent of the Streamlit UI,
+so the same logic drives the live app and offline transcript replay
+"""
+
+import math
+from typing import Callable, Dict, List, Optional
+
+from admission import CapacityExceeded
+from conversation import ConversationManager, ConversationState
+from question_bank import BANK_SOURCE_NOTE
+
+TECH_KEYWORDS = ['technical', 'tech', 'coding', 'programming']
+BEHAVIORAL_KEYWORDS = ['behavioral', 'behaviour', 'soft', 'experience']
+
+
+def requested_question_types(user_input: str) -> List[str]:
+    """Work out which question types the user asked for"""
+    user_input_lower = user_input.lower()
+    if any(word in user_input_lower for word in TECH_KEYWORDS):
+        return ["Technical"]
+    if any(word in user_input_lower for word in BEHAVIORAL_KEYWORDS):
+        return ["Behavioral"]
+    return ["Technical", "Behavioral"]
+
+
+def build_questions_ready_response(count: int, from_bank: int = 0) -> str:
+    """Response shown once questions have been generated"""
+    response = f"🎉 **Perfect! I've generated {count} personalized interview questions for you!**\n\n"
+    response += "**Your questions are now displayed in the sidebar.** ➡️\n\n"
+    if from_bank:
+        response += f"*The AI service was unavailable, so {from_bank} of these come from our question bank " \
+                    "and are marked as such.*\n\n"
+    response += "**Interview Preparation Tips:**\n"
+    response += "• **Practice STAR method** for behavioral questions (Situation, Task, Action, Result)\n"
+    response += "• **Review fundamental concepts** related to your tech stack\n"
+    response += "• **Prepare specific examples** from your experience\n"
+    response += "• **Research the company** and role requirements\n\n"
+    response += "**Would you like me to:**\n"
+    response += "• Generate more questions for a different role?\n"
+    response += "• Start over with new information?\n"
+    response += "• End this session?\n\n"
+    response += "*Just let me know! Say 'bye' when you're ready to finish.*"
+    return response
+
+
+def build_generation_started_response() -> str:
+    """Response shown when question generation is handed to a background job"""
+    response = "⏳ **Generating your personalized interview questions...**\n\n"
+    response += "They will appear here as soon as they're ready. Say 'bye' if you'd like to stop."
+    return response
+
+
+def build_capacity_response(retry_after: float) -> str:
+    """Response shown when the server is already running as many generations as it allows"""
+    response = "⏳ **Lots of candidates are generating questions right now.**\n\n"
+    response += f"Please send your request again in about {math.ceil(retry_after)} seconds."
+    return response
+
+
+def build_generation_error_response(error: Exception) -> str:
+    """Response shown when question generation fails"""
+    response = f"❌ **I encountered an error generating questions:** {str(error)}\n\n"
+    response += "This might be due to API connectivity. Please check:\n"
+    response += "• Your internet connection\n"
+    response += "• Groq API key configuration\n\n"
+    response += "Would you like to try again or need help with setup?"
+    return response
+
+
+def generate_questions(profile, question_types: List[str], model: str,
+                       tech_generator: Callable, behavioral_generator: Callable) -> List[Dict[str, str]]:
+    """Generate the requested question types for a candidate profile"""
+    questions_generated = []
+
+    for q_type in question_types:
+        if q_type == "Technical":
+            questions = tech_generator(
+                ", ".join(profile.tech_stack),
+                profile.position,
+                profile.experience,
+                model
+            )
+        else:
+            questions = behavioral_generator(
+                profile.position,
+                profile.experience,
+                model
+            )
+
+        for q in questions:
+            if q.strip():
+                questions_generated.append({"type": q_type, "question": q.strip()})
+
+    return questions_generated
+
+
+def apply_generated_questions(session, questions: List[Dict[str, str]]) -> str:
+    """Store generated questions, end the flow and return the response"""
+    session.generated_questions = questions
+    session.conversation_state = ConversationState.ENDING
+    from_bank = sum(1 for q in questions if q["question"].endswith(BANK_SOURCE_NOTE.strip()))
+    return build_questions_ready_response(len(questions), from_bank)
+
+
+def process_user_input(conv_manager: ConversationManager, session, user_input: str, model: str,
+                       tech_generator: Callable, behavioral_generator: Callable,
+                       info_extractor: Optional[Callable] = None,
+                       start_generation: Optional[Callable[[List[str]], None]] = None) -> str:
+    """Advance the conversation for one user message and return the assistant response
+
+    `session` is anything with the session-state attributes the app uses
+    (st.session_state in the app, a plain namespace during replay). Both the
+    user message and the response are appended to its conversation history.
+    `info_extractor` is the fallback for profile fields the regex pass misses.
+    `start_generation(question_types)`, when given, hands generation to a
+    background job instead: the session moves to GENERATING_QUESTIONS and the
+    job applies its result later with `apply_generated_questions`.
+    """
+    session.conversation_history.append({
+        "role": "user",
+        "content": user_input
+    })
+
+    # Check for conversation ending
+    if conv_manager.detect_conversation_ending(user_input):
+        session.conversation_state = ConversationState.ENDING
+        response = conv_manager.get_conversation_prompt(ConversationState.ENDING)
+
+    # Process based on current state
+    elif session.conversation_state == ConversationState.GREETING:
+        # Parse initial information
+        profile, issues = conv_manager.parse_user_info(user_input, session.candidate_profile, info_extractor)
+        session.candidate_profile = profile
+
+        if not issues:
+            # All basic info collected, move to tech stack
+            session.conversation_state = ConversationState.TECH_STACK_INPUT
+            response = conv_manager.get_conversation_prompt(ConversationState.TECH_STACK_INPUT)
+        else:
+            # Need more information
+            session.conversation_state = ConversationState.COLLECTING_INFO
+            response = conv_manager.get_conversation_prompt(ConversationState.COLLECTING_INFO)
+            response += f"\n\n**Still needed:** {', '.join(issues)}"
+
+    elif session.conversation_state == ConversationState.COLLECTING_INFO:
+        # Continue collecting missing information
+        profile, issues = conv_manager.parse_user_info(user_input, session.candidate_profile, info_extractor)
+        session.candidate_profile = profile
+
+        if not issues:
+            session.conversation_state = ConversationState.TECH_STACK_INPUT
+            response = conv_manager.get_conversation_prompt(ConversationState.TECH_STACK_INPUT)
+        else:
+            response = f"Great! I got some information. **Still needed:** {', '.join(issues)}\n\n"
+            response += conv_manager.get_conversation_prompt(ConversationState.COLLECTING_INFO)
+
+    elif session.conversation_state == ConversationState.TECH_STACK_INPUT:
+        # Extract technologies
+        techs = conv_manager.extract_tech_stack(user_input)
+
+        if techs:
+            session.candidate_profile.tech_stack = techs
+            session.conversation_state = ConversationState.FOLLOW_UP
+            response = f"Excellent! I found these technologies: **{', '.join(techs)}**\n\n"
+            response += conv_manager.get_conversation_prompt(ConversationState.FOLLOW_UP)
+        else:
+            response = "I couldn't identify specific technologies from your input. "
+            response += conv_manager.get_conversation_prompt(ConversationState.TECH_STACK_INPUT)
+
+    elif session.conversation_state == ConversationState.FOLLOW_UP and start_generation is not None:
+        # Chat while the job runs is answered in GENERATING_QUESTIONS without resubmitting it
+        session.conversation_state = ConversationState.GENERATING_QUESTIONS
+        try:
+            start_generation(requested_question_types(user_input))
+            response = build_generation_started_response()
+        except CapacityExceeded as e:
+            session.conversation_state = ConversationState.FOLLOW_UP
+            response = build_capacity_response(e.retry_after)
+        except Exception as e:
+            session.conversation_state = ConversationState.FOLLOW_UP
+            response = build_generation_error_response(e)
+
+    elif session.conversation_state == ConversationState.FOLLOW_UP:
+        # Determine question type and generate
+        try:
+            questions = generate_questions(
+                session.candidate_profile, requested_question_types(user_input), model,
+                tech_generator, behavioral_generator
+            )
+            response = apply_generated_questions(session, questions)
+
+        except Exception as e:
+            response = build_generation_error_response(e)
+
+    else:
+        # Fallback response
+        response = conv_manager.generate_fallback_response(user_input, session.conversation_state)
+
+    # Add response to history
+    session.conversation_history.append({
+        "role": "assistant",
+        "content": response
+    })
+    return response
@@ -2,6 +2,8 @@
 Configuration settings for TalentScout AI Chatbot
 """
 
+import os
+
 # Groq Model Settings - Updated May 2025
 DEFAULT_MODEL = "llama-3.3-70b-versatile"
 ALTERNATIVE_MODELS = [
@@ -12,12 +14,89 @@ ALTERNATIVE_MODELS = [
     "gemma2-9b-it",                 # Google's efficient model
 ]
 
+# Automatic model routing ("auto" in the model selector)
+# Approximate output price (USD per 1K tokens), quality tier (1-3) and throughput per model
+MODEL_ROUTING = {
+    "llama-3.3-70b-versatile": {"cost_per_1k_tokens": 0.79, "quality": 3, "tokens_per_second": 275},
+    "llama-3.1-8b-instant": {"cost_per_1k_tokens": 0.08, "quality": 1, "tokens_per_second": 750},
+    "llama3-70b-8192": {"cost_per_1k_tokens": 0.79, "quality": 3, "tokens_per_second": 330},
+    "llama3-8b-8192": {"cost_per_1k_tokens": 0.08, "quality": 1, "tokens_per_second": 1250},
+    "gemma2-9b-it": {"cost_per_1k_tokens": 0.20, "quality": 2, "tokens_per_second": 500},
+}
+
+# Minimum quality tier per (question type, difficulty)
+ROUTING_REQUIRED_QUALITY = {
+    ("technical", "beginner"): 2,
+    ("technical", "intermediate"): 2,
+    ("technical", "advanced"): 3,
+    ("behavioral", "beginner"): 1,
+    ("behavioral", "intermediate"): 1,
+    ("behavioral", "advanced"): 2,
+}
+
+# Routing objective: relative weight of cost vs latency, plus error handling
+ROUTING_COST_WEIGHT = 0.5
+ROUTING_LATENCY_WEIGHT = 0.5
+ROUTING_ERROR_PENALTY = 2.0
+ROUTING_MAX_ERROR_RATE = 0.5
+ROUTING_WINDOW = 20
+ROUTING_OUTCOME_TTL_SECONDS = 300
+
+# Cross-session micro-batching of generation requests (opt-in)
+GENERATION_BATCHING_ENABLED = os.getenv("GENERATION_BATCHING", "").lower() in ("1", "true", "yes")
+GENERATION_BATCH_WINDOW_SECONDS = 0.05
+GENERATION_BATCH_MAX_WAIT_SECONDS = 0.2
+# Batches are capped at GENERATION_BATCH_MAX_TOKENS // per-request max tokens
+GENERATION_BATCH_MAX_SIZE = 4
+GENERATION_BATCH_MAX_TOKENS = 4000
+
+# Background generation jobs (shared worker pool per process)
+GENERATION_WORKERS = 8
+JOB_RESULT_TTL_SECONDS = 600
+# Jobs not polled for this long belong to a closed page and are cancelled;
+# generous because browsers throttle timers in background tabs
+JOB_ABANDON_SECONDS = 90
+JOB_POLL_INTERVAL_SECONDS = 1.0
+
+# Admission control: token buckets (requests/second, burst size) and generation ceiling
+ADMISSION_SESSION_RATE = 0.5
+ADMISSION_SESSION_BURST = 5
+ADMISSION_CLIENT_RATE = 2.0
+ADMISSION_CLIENT_BURST = 20
+ADMISSION_MAX_INFLIGHT_GENERATIONS = 16
+ADMISSION_CAPACITY_RETRY_SECONDS = 5
+ADMISSION_MAX_TRACKED_BUCKETS = 10000
+# Proxies in front of the app that append to X-Forwarded-For (Heroku's router is one);
+# 0 ignores the header and uses the socket address
+ADMISSION_TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", "1"))
+
+# Fallback profile extraction for fields the regex pass misses
+PROFILE_EXTRACTION_MODEL = "llama-3.1-8b-instant"
+PROFILE_EXTRACTION_MAX_TOKENS = 100
+PROFILE_EXTRACTION_TIMEOUT_SECONDS = 2.0
+PROFILE_EXTRACTION_CACHE_SIZE = 1024
+PROFILE_EXTRACTION_MIN_WORDS = 3  # Shorter messages, greetings aside, skip the fallback
+
+# Per-technology fan-out for large tech stacks
+TECH_FANOUT_ENABLED = os.getenv("TECH_FANOUT", "true").lower() in ("1", "true", "yes")
+TECH_FANOUT_MIN_STACK = 6
+TECH_FANOUT_GROUP_SIZE = 2
+TECH_FANOUT_MAX_GROUPS = 5
+TECH_FANOUT_MAX_TOKENS = 300
+TECH_FANOUT_WORKERS = 16
+
 # Question Generation Settings
 DEFAULT_TECH_QUESTIONS = 5
 DEFAULT_BEHAVIORAL_QUESTIONS = 5
 MAX_TECH_STACK_ITEMS = 10
 MAX_INPUT_LENGTH = 500
 
+# Resume ingestion (pasted text or uploaded .txt/.md)
+RESUME_MAX_BYTES = 512 * 1024
+RESUME_CHUNK_SIZE = 8192
+RESUME_HEADER_LINES = 5
+RESUME_MAX_LINE_CHARS = 1024  # Longer lines are re-split before extraction
+
 # Temperature settings for different question types
 TECH_TEMPERATURE = 0.7
 BEHAVIORAL_TEMPERATURE = 0.6
@@ -41,3 +120,31 @@ ROLE_PROMPTS = {
     "product manager": "Focus on strategy, user experience, and stakeholder management",
     "designer": "Emphasize user experience, design principles, and tools"
 }
+
+# Session persistence (resume after refreshes and process restarts)
+# Local directory only; on Heroku the dyno filesystem, and these sessions, are wiped on dyno restart
+SESSION_STORE_DIR = os.getenv(
+    "SESSION_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".sessions")
+)
+SESSION_TTL_SECONDS = 7 * 24 * 3600
+SESSION_PURGE_INTERVAL_SECONDS = 3600
+SESSION_QUERY_PARAM = "session"
+
+# Admin sidebar section (profiling toggle, admission metrics)
+ADMIN_CONTROLS = os.getenv("TALENTSCOUT_ADMIN", "").lower() in ("1", "true", "yes")
+
+# Per-turn profiling: enabled via env var, ?profile=1, or the admin sidebar toggle
+PROFILE_TURNS = os.getenv("PROFILE_TURNS", "").lower() in ("1", "true", "yes")
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_OUTPUT_DIR = "profiles"
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.005
+
+# Transcript recording: append-only JSONL log of every chat turn (disabled when empty)
+TRANSCRIPT_LOG_PATH = os.getenv("TRANSCRIPT_LOG", "")
+
+# Read-only question bank and tech lexicon (compiled from the JSON source, shared via mmap)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+QUESTION_BANK_SOURCE = os.path.join(DATA_DIR, "question_bank.json")
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", os.path.join(DATA_DIR, "question_bank.bin"))
+QUESTION_BANK_CHECK_INTERVAL_SECONDS = 5
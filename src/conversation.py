@@ -5,9 +5,15 @@ Handles natural conversation flow, greetings, and context management
 
 import streamlit as st
 import re
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 from enum import Enum
+from config import SESSION_QUERY_PARAM, PROFILE_EXTRACTION_MIN_WORDS
+from candidate import (
+    CandidateProfile, TECH_PATTERNS, ROLE_KEYWORD_PATTERN, PLACEHOLDER_VALUES,
+    EMAIL_PATTERN, EXPERIENCE_PATTERNS
+)
+from question_bank import canonical_tech
+import session_store
 
 class ConversationState(Enum):
     GREETING = "greeting"
@@ -17,19 +23,6 @@ class ConversationState(Enum):
     FOLLOW_UP = "follow_up"
     ENDING = "ending"
 
-@dataclass
-class CandidateProfile:
-    name: str = ""
-    email: str = ""
-    position: str = ""
-    experience: int = 0
-    tech_stack: List[str] = None
-    question_type: str = ""
-    
-    def __post_init__(self):
-        if self.tech_stack is None:
-            self.tech_stack = []
-
 class ConversationManager:
     """Manages the conversation flow and context"""
     
@@ -46,6 +39,9 @@ class ConversationManager:
     
     def initialize_session(self):
         """Initialize session state for conversation"""
+        if 'session_token' not in st.session_state:
+            self.restore_session()
+        
         if 'conversation_state' not in st.session_state:
             st.session_state.conversation_state = ConversationState.GREETING
         
@@ -61,6 +57,76 @@ class ConversationManager:
         if 'current_step' not in st.session_state:
             st.session_state.current_step = 0
     
+    def restore_session(self):
+        """Resume a persisted session from the token in the URL, or start a new one"""
+        session_store.maybe_purge_expired_sessions()
+        
+        token = st.query_params.get(SESSION_QUERY_PARAM, "")
+        if not session_store.is_valid_token(token):
+            token = session_store.new_session_token()
+            st.query_params[SESSION_QUERY_PARAM] = token
+        
+        st.session_state.session_token = token
+        st.session_state.persisted_history_len = 0
+        
+        snapshot = session_store.load_snapshot(token)
+        if snapshot is None:
+            return
+        
+        profile_fields, state_value, questions = snapshot
+        try:
+            st.session_state.conversation_state = ConversationState(state_value)
+        except ValueError:
+            return
+        st.session_state.candidate_profile = CandidateProfile(**profile_fields)
+        st.session_state.generated_questions = questions
+        # History is the heavy part; it is only read back when it is rendered
+        st.session_state.conversation_history = []
+        st.session_state.history_restore_pending = True
+    
+    def ensure_history_loaded(self):
+        """Load persisted conversation history on first render after a resume"""
+        if not st.session_state.get('history_restore_pending'):
+            return
+        
+        history = session_store.load_history(st.session_state.session_token)
+        st.session_state.conversation_history = history + st.session_state.conversation_history
+        st.session_state.persisted_history_len = len(history)
+        st.session_state.history_restore_pending = False
+    
+    def persist_session(self):
+        """Write the session snapshot and append any new history messages"""
+        token = st.session_state.get('session_token')
+        if not token:
+            return
+        
+        try:
+            session_store.save_snapshot(
+                token,
+                st.session_state.candidate_profile,
+                st.session_state.conversation_state.value,
+                st.session_state.generated_questions
+            )
+            
+            if st.session_state.get('history_restore_pending'):
+                return
+            
+            history = st.session_state.conversation_history
+            persisted = st.session_state.get('persisted_history_len', 0)
+            session_store.append_history(token, history[persisted:])
+            st.session_state.persisted_history_len = len(history)
+        except OSError:
+            # Persistence is best effort; the live session keeps working without it
+            pass
+    
+    def clear_session(self):
+        """Delete persisted data for the current session and drop its token"""
+        token = st.session_state.get('session_token')
+        if token:
+            session_store.delete_session(token)
+        if SESSION_QUERY_PARAM in st.query_params:
+            del st.query_params[SESSION_QUERY_PARAM]
+    
     def detect_conversation_ending(self, user_input: str) -> bool:
         """Detect if user wants to end conversation"""
         if not user_input:
@@ -77,20 +143,20 @@ class ConversationManager:
         user_input_lower = user_input.lower().strip()
         return any(greeting in user_input_lower for greeting in self.greeting_keywords)
     
+    def is_small_talk(self, user_input: str) -> bool:
+        """Whether a message is only a greeting or too short to carry profile details"""
+        user_input_lower = user_input.lower()
+        for greeting in self.greeting_keywords:
+            user_input_lower = re.sub(rf'\b{re.escape(greeting)}\b', ' ', user_input_lower)
+        return len(re.findall(r'[\w@.+-]+', user_input_lower)) < PROFILE_EXTRACTION_MIN_WORDS
+    
     def extract_tech_stack(self, user_input: str) -> List[str]:
         """Extract technology stack from user input"""
-        # Common tech keywords and patterns
-        tech_patterns = [
-            r'\b(?:python|java|javascript|js|typescript|ts|react|angular|vue|node\.?js|django|flask|fastapi|spring|laravel|php|ruby|rails|go|golang|rust|c\+\+|c#|swift|kotlin|flutter|dart|sql|mysql|postgresql|mongodb|redis|docker|kubernetes|aws|azure|gcp|git|jenkins|terraform|ansible)\b',
-            r'\b(?:html|css|sass|scss|bootstrap|tailwind|jquery|express|nest\.?js|next\.?js|nuxt\.?js|svelte|ember|backbone|d3\.?js|three\.?js|chart\.?js)\b',
-            r'\b(?:machine learning|ml|ai|artificial intelligence|data science|pandas|numpy|scipy|scikit-learn|tensorflow|pytorch|keras|opencv)\b'
-        ]
-        
         found_techs = []
         user_input_lower = user_input.lower()
         
-        for pattern in tech_patterns:
-            matches = re.findall(pattern, user_input_lower, re.IGNORECASE)
+        for pattern in TECH_PATTERNS:
+            matches = pattern.findall(user_input_lower)
             found_techs.extend(matches)
         
         # Also split by common separators
@@ -110,9 +176,10 @@ class ConversationManager:
         unique_techs = []
         seen = set()
         for tech in found_techs:
-            tech_clean = tech.strip().lower()
+            tech = canonical_tech(tech.strip())
+            tech_clean = tech.lower()
             if tech_clean not in seen and len(tech_clean) > 1:
-                unique_techs.append(tech.strip())
+                unique_techs.append(tech)
                 seen.add(tech_clean)
         
         return unique_techs[:10]  # Limit to 10 technologies
@@ -201,27 +268,24 @@ class ConversationManager:
         
         return prompts.get(state, "I'm here to help with your interview preparation. What would you like to know?")
     
-    def parse_user_info(self, user_input: str, profile: CandidateProfile) -> Tuple[CandidateProfile, List[str]]:
-        """Parse user input to extract candidate information"""
+    def parse_user_info(self, user_input: str, profile: CandidateProfile,
+                        fallback: Optional[Callable[[str, List[str]], Dict]] = None) -> Tuple[CandidateProfile, List[str]]:
+        """Parse user input to extract candidate information
+        
+        The regex pass runs first; `fallback(user_input, missing_fields)` is only
+        consulted when a required field is still missing afterwards.
+        """
         issues = []
         updated_profile = profile
         
         # Extract email
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        email_match = re.search(email_pattern, user_input)
+        email_match = EMAIL_PATTERN.search(user_input)
         if email_match and not updated_profile.email:
             updated_profile.email = email_match.group()
         
         # Extract experience years
-        experience_patterns = [
-            r'(\d+)\s*(?:years?|yrs?)\s*(?:of\s*)?(?:experience|exp)',
-            r'(?:experience|exp)\s*(?:of\s*)?(\d+)\s*(?:years?|yrs?)',
-            r'(\d+)\s*(?:years?|yrs?)\s*(?:in|working|coding|programming)',
-            r'(?:have|with|got)\s*(\d+)\s*(?:years?|yrs?)'
-        ]
-        
-        for pattern in experience_patterns:
-            match = re.search(pattern, user_input.lower())
+        for pattern in EXPERIENCE_PATTERNS:
+            match = pattern.search(user_input.lower())
             if match and not updated_profile.experience:
                 try:
                     years = int(match.group(1))
@@ -266,6 +330,15 @@ class ConversationManager:
                 if updated_profile.position:
                     break
         
+        # Ask the fallback extractor only for a name or role the regex pass missed,
+        # and not for greetings or one-word replies that cannot contain them. Email
+        # is never asked for: the regex pass already found any address in the input
+        if fallback and not (updated_profile.name and updated_profile.position) \
+                and not self.is_small_talk(user_input):
+            missing = [field for field in ("name", "position", "experience")
+                       if not getattr(updated_profile, field)]
+            self.apply_extracted_fields(user_input, updated_profile, fallback(user_input, missing))
+        
         # Validate completeness
         if not updated_profile.name:
             issues.append("Please provide your name")
@@ -276,6 +349,31 @@ class ConversationManager:
         
         return updated_profile, issues
     
+    def apply_extracted_fields(self, user_input: str, profile: CandidateProfile, fields: Dict) -> None:
+        """Fill empty profile fields from fallback extraction, rejecting implausible values"""
+        user_input_lower = user_input.lower()
+        
+        name = str(fields.get("name") or "").strip()
+        if not profile.name and name and name.lower() not in PLACEHOLDER_VALUES and len(name.split()) <= 3 and \
+           re.match(r"^[A-Za-z][A-Za-z'\- ]+$", name) and name.lower() in user_input_lower:
+            profile.name = name.title()
+        
+        # A role must be stated in the input, or at least share a role keyword with it
+        position = str(fields.get("position") or "").strip()
+        if not profile.position and 3 <= len(position) <= 50 and position.lower() not in PLACEHOLDER_VALUES:
+            keyword = ROLE_KEYWORD_PATTERN.search(position)
+            if position.lower() in user_input_lower or \
+               (keyword and keyword.group().lower() in user_input_lower):
+                profile.position = position.title()
+        
+        if not profile.experience:
+            try:
+                years = int(fields.get("experience") or 0)
+            except (TypeError, ValueError):
+                years = 0
+            if 0 < years <= 50:
+                profile.experience = years
+    
     def generate_fallback_response(self, user_input: str, state: ConversationState) -> str:
         """Generate meaningful fallback responses"""
         fallback_responses = {
@@ -323,6 +421,12 @@ class ConversationManager:
             • "Both types" - complete interview prep
             
             Just let me know your preference! 🎯
+            """,
+            
+            ConversationState.GENERATING_QUESTIONS: """
+            ⏳ **Your questions are still being generated.**
+            
+            They will appear here as soon as they're ready. Say "bye" if you'd like to stop and end the session.
             """
         }
         
@@ -0,0 +1,143 @@
+"""
+Background generation jobs for TalentScout AI
+A process-level worker pool shared by every session, so LLM calls run outside
+the Streamlit script run and survive reruns and browser refreshes
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from admission import admission_controller
+from config import GENERATION_WORKERS, JOB_RESULT_TTL_SECONDS, JOB_ABANDON_SECONDS, ADMISSION_MAX_INFLIGHT_GENERATIONS
+
+
+class GenerationJob:
+    """A submitted generation and the context needed to apply its result"""
+
+    def __init__(self, job_id: str, session_token: str, key: Hashable, future: Future, context: Dict):
+        self.job_id = job_id
+        self.session_token = session_token
+        self.key = key
+        self.future = future
+        self.context = context
+        self.created_at = time.time()
+        self.last_polled = self.created_at
+        self.cancelled = False
+        self.consumed = False
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+
+class JobQueue:
+    """Runs jobs on a shared pool, deduplicating identical submits per session"""
+
+    def __init__(self, max_workers: int = GENERATION_WORKERS, max_in_flight: int = ADMISSION_MAX_INFLIGHT_GENERATIONS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="generation")
+        self._max_in_flight = max_in_flight
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._session_jobs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_token: str, key: Hashable, fn: Callable, *args: Any,
+               context: Optional[Dict] = None) -> str:
+        """Submit a job for a session and return its id
+
+        Submitting the same key again while its job is live returns the
+        existing job id; a different key cancels the session's previous job.
+        Raises CapacityExceeded when the global in-flight ceiling is reached,
+        checked under the same lock that registers the new job.
+        """
+        with self._lock:
+            self._cancel_abandoned()
+            self._purge_expired()
+
+            previous = self._jobs.get(self._session_jobs.get(session_token, ""))
+            if previous is not None and (previous.cancelled or previous.consumed):
+                previous = None
+            if previous is not None and previous.key == key:
+                return previous.job_id
+
+            # A rejected submit leaves the session's previous job running
+            if sum(1 for job in self._jobs.values() if not job.done) >= self._max_in_flight:
+                raise admission_controller.reject_capacity(session_token)
+            if previous is not None:
+                self._cancel(previous)
+
+            job_id = uuid.uuid4().hex
+            future = self._executor.submit(fn, *args)
+            self._jobs[job_id] = GenerationJob(job_id, session_token, key, future, context or {})
+            self._session_jobs[session_token] = job_id
+            return job_id
+
+    def get(self, job_id: Optional[str]) -> Optional[GenerationJob]:
+        """Look up a job that is neither cancelled nor already applied
+
+        Every lookup counts as a poll from the owning session; see `_cancel_abandoned`.
+        """
+        with self._lock:
+            self._cancel_abandoned()
+            job = self._jobs.get(job_id) if job_id else None
+            if job is None or job.cancelled or job.consumed:
+                return None
+            job.last_polled = time.time()
+            return job
+
+    def session_job(self, session_token: str) -> Optional[GenerationJob]:
+        """The session's latest job whose result has not been applied yet"""
+        with self._lock:
+            job = self._jobs.get(self._session_jobs.get(session_token, ""))
+            if job is None or job.cancelled or job.consumed:
+                return None
+            job.last_polled = time.time()
+            return job
+
+    def in_flight_count(self) -> int:
+        """Number of jobs still queued or running, including cancelled calls in flight"""
+        with self._lock:
+            self._cancel_abandoned()
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def consume(self, job: GenerationJob) -> None:
+        """Mark a job's result as applied so it is not applied twice"""
+        with self._lock:
+            job.consumed = True
+
+    def cancel_session(self, session_token: str) -> None:
+        """Cancel the session's outstanding job, e.g. when the session ends"""
+        with self._lock:
+            job = self._jobs.get(self._session_jobs.pop(session_token, ""))
+            if job is not None:
+                self._cancel(job)
+
+    def _cancel(self, job: GenerationJob) -> None:
+        # A call already in flight cannot be interrupted; its result is just dropped
+        job.cancelled = True
+        job.future.cancel()
+
+    def _cancel_abandoned(self) -> None:
+        # A session whose page was closed stops polling its job; drop the job
+        # instead of letting it hold a worker. Finished results are kept until
+        # the TTL so a returning visitor still gets them
+        cutoff = time.time() - JOB_ABANDON_SECONDS
+        for job in self._jobs.values():
+            if not job.done and not job.cancelled and not job.consumed and job.last_polled < cutoff:
+                self._cancel(job)
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - JOB_RESULT_TTL_SECONDS
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.created_at < cutoff and (job.done or job.cancelled)
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._session_jobs.get(job.session_token) == job_id:
+                del self._session_jobs[job.session_token]
+
+
+job_queue = JobQueue()
@@ -0,0 +1,152 @@
+"""
+On-demand per-turn profiler for TalentScout AI
+Samples the Streamlit script thread for the duration of one script run, or a
+background generation job until it finishes, together with the worker threads
+it fans out to, and writes the result as a collapsed-stack file
+(flamegraph.pl / speedscope input)
+"""
+
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import FrameType
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from config import PROFILE_OUTPUT_DIR, PROFILE_SAMPLE_INTERVAL_SECONDS
+
+# Keeps file names unique when several runs start in the same millisecond
+_run_counter = itertools.count()
+
+# Profiler of the job running in this context, picked up by fan-out workers
+_active_profiler: ContextVar[Optional["TurnProfiler"]] = ContextVar("active_profiler", default=None)
+
+
+class TurnProfiler:
+    """Sampling profiler bound to a single run of the calling script
+
+    The sampler runs in a background thread and stops by itself once the
+    root frame is no longer on the profiled thread's stack, which covers
+    normal completion as well as `st.rerun()` and `st.stop()`. Worker
+    threads doing part of the work can join for a while with `attach()`;
+    their stacks are recorded under the worker thread's name.
+    """
+
+    def __init__(self, tag: str, interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS):
+        self.tag = re.sub(r'[^A-Za-z0-9_.-]', '_', tag)
+        self.interval = interval
+        self.output_path: Optional[str] = None
+        self._samples = Counter()
+        self._thread_id = None
+        self._root_frame = None
+        self._attached: Dict[int, Tuple[str, FrameType]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, root_frame: Optional[FrameType] = None) -> None:
+        """Start sampling the calling script run, or the calling thread until `root_frame` returns"""
+        self._thread_id = threading.get_ident()
+        if root_frame is None:
+            root_frame = sys._getframe(1)
+            while root_frame.f_back and root_frame.f_code.co_name != "<module>":
+                root_frame = root_frame.f_back
+        self._root_frame = root_frame
+        self._started_at = time.time()
+
+        sampler = threading.Thread(target=self._sample_loop, name="turn-profiler", daemon=True)
+        sampler.start()
+
+    @contextmanager
+    def attach(self) -> Iterator[None]:
+        """Also sample the calling worker thread while the block runs"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._attached[thread_id] = (threading.current_thread().name, sys._getframe(2))
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._attached.pop(thread_id, None)
+
+    def _sample_loop(self) -> None:
+        try:
+            while True:
+                time.sleep(self.interval)
+                frames = sys._current_frames()
+                stack = self._collapse(frames.get(self._thread_id), self._root_frame)
+                if stack is None:
+                    break
+                self._samples[stack] += 1
+                with self._lock:
+                    attached = list(self._attached.items())
+                for thread_id, (name, root) in attached:
+                    worker_stack = self._collapse(frames.get(thread_id), root)
+                    if worker_stack is not None:
+                        self._samples[f"[{name}];{worker_stack}"] += 1
+            self._write()
+        finally:
+            self._root_frame = None
+            self._attached.clear()
+
+    @staticmethod
+    def _collapse(frame: Optional[FrameType], root_frame: FrameType) -> Optional[str]:
+        """Return the stack down to `root_frame` in collapsed form, or None once it has returned"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            if frame is root_frame:
+                return ";".join(reversed(names))
+            frame = frame.f_back
+        return None
+
+    def _write(self) -> None:
+        if not self._samples:
+            return
+        os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._started_at))
+        millis = int(self._started_at * 1000) % 1000
+        path = os.path.join(
+            PROFILE_OUTPUT_DIR,
+            f"{timestamp}.{millis:03d}-{next(_run_counter)}_{self.tag}.collapsed"
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.output_path = path
+
+
+def profile_turn(session_token: str, state_value: str) -> TurnProfiler:
+    """Profile the rest of the current script run, tagged with session and state"""
+    profiler = TurnProfiler(f"{session_token[:8]}_{state_value}")
+    profiler.start()
+    return profiler
+
+
+def profile_job(tag: str, fn: Callable) -> Callable:
+    """Wrap a background job so its worker thread is profiled until it returns"""
+    def profiled(*args, **kwargs):
+        profiler = TurnProfiler(f"{tag}_job")
+        profiler.start(root_frame=sys._getframe())
+        token = _active_profiler.set(profiler)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active_profiler.reset(token)
+    return profiled
+
+
+def propagate(fn: Callable) -> Callable:
+    """Bind `fn` to the calling job's profiler, if any, before handing it to another thread"""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return fn
+
+    def attached(*args, **kwargs):
+        with profiler.attach():
+            return fn(*args, **kwargs)
+    return attached
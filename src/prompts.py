@@ -1,6 +1,29 @@
-from groq import Groq
+from groq import Groq, APIStatusError
 import os
+import time
+import logging
+import re
+import json
+import math
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from batching import MicroBatcher
+from profiling import propagate
+from question_bank import BANK_SOURCE_NOTE, bank_questions
+from config import (
+    ALTERNATIVE_MODELS, MODEL_ROUTING, ROUTING_REQUIRED_QUALITY,
+    ROUTING_COST_WEIGHT, ROUTING_LATENCY_WEIGHT, ROUTING_ERROR_PENALTY,
+    ROUTING_MAX_ERROR_RATE, ROUTING_WINDOW, ROUTING_OUTCOME_TTL_SECONDS,
+    GENERATION_BATCHING_ENABLED, GENERATION_BATCH_WINDOW_SECONDS,
+    GENERATION_BATCH_MAX_WAIT_SECONDS, GENERATION_BATCH_MAX_SIZE,
+    GENERATION_BATCH_MAX_TOKENS,
+    PROFILE_EXTRACTION_MODEL, PROFILE_EXTRACTION_MAX_TOKENS,
+    PROFILE_EXTRACTION_TIMEOUT_SECONDS, PROFILE_EXTRACTION_CACHE_SIZE,
+    TECH_FANOUT_ENABLED, TECH_FANOUT_MIN_STACK, TECH_FANOUT_GROUP_SIZE,
+    TECH_FANOUT_MAX_GROUPS, TECH_FANOUT_MAX_TOKENS, TECH_FANOUT_WORKERS
+)
 
 # Import config values directly to avoid import issues
 DEFAULT_MODEL = "llama-3.3-70b-versatile"
@@ -23,18 +46,132 @@ load_dotenv()
 # Initialize Groq client
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
-def generate_tech_questions(tech_stack: str, position: str = "", experience: int = 0, model: str = None):
-    """Generate technical interview questions based on tech stack and role"""
+logger = logging.getLogger(__name__)
+
+# Pass as `model` to let the router pick one per request
+AUTO_MODEL = "auto"
+
+# Section header the batched prompt asks the model to emit per candidate
+BATCH_SECTION_PATTERN = re.compile(r'^\W*candidate\s+(\d+)\W*$', re.IGNORECASE | re.MULTILINE)
+
+
+def get_difficulty(experience: int) -> str:
+    """Map years of experience to a difficulty level"""
+    return "beginner" if experience < 2 else "intermediate" if experience < 5 else "advanced"
+
+
+class ModelRouter:
+    """Picks a model per request from recent latency, error rate and cost"""
+    
+    def __init__(self, models=None):
+        self.models = list(models or ALTERNATIVE_MODELS)
+        self._outcomes = {model: deque(maxlen=ROUTING_WINDOW) for model in self.models}
+        self._lock = threading.Lock()
     
-    difficulty = "beginner" if experience < 2 else "intermediate" if experience < 5 else "advanced"
+    def _stats(self, model: str):
+        """Return (mean seconds per output token or None, error rate) over recent outcomes
+        
+        Outcomes older than ROUTING_OUTCOME_TTL_SECONDS are ignored, so a model
+        excluded after an outage becomes eligible again once its errors age out.
+        """
+        cutoff = time.monotonic() - ROUTING_OUTCOME_TTL_SECONDS
+        with self._lock:
+            outcomes = [o for o in self._outcomes.get(model, ()) if o[0] >= cutoff]
+        if not outcomes:
+            return None, 0.0
+        per_token = [seconds_per_token for _, seconds_per_token, ok in outcomes if ok]
+        error_rate = sum(1 for _, _, ok in outcomes if not ok) / len(outcomes)
+        mean_per_token = sum(per_token) / len(per_token) if per_token else None
+        return mean_per_token, error_rate
+    
+    def _estimate(self, model: str, expected_tokens: int):
+        """Estimate (cost, latency, error rate) for a request on a model"""
+        profile = MODEL_ROUTING.get(model, {})
+        cost = expected_tokens / 1000 * profile.get("cost_per_1k_tokens", 1.0)
+        seconds_per_token, error_rate = self._stats(model)
+        if seconds_per_token is None:
+            seconds_per_token = 1 / profile.get("tokens_per_second", 100)
+        return cost, seconds_per_token * expected_tokens, error_rate
+    
+    def choose(self, question_type: str, difficulty: str, expected_tokens: int) -> str:
+        """Choose the cheapest/fastest model that meets the quality bar"""
+        required = ROUTING_REQUIRED_QUALITY.get((question_type, difficulty), 3)
+        candidates = [
+            model for model in self.models
+            if MODEL_ROUTING.get(model, {}).get("quality", 0) >= required
+        ] or list(self.models)
+        
+        estimates = {model: self._estimate(model, expected_tokens) for model in candidates}
+        healthy = [m for m in candidates if estimates[m][2] <= ROUTING_MAX_ERROR_RATE]
+        if healthy:
+            candidates = healthy
+        
+        max_cost = max(estimates[m][0] for m in candidates) or 1.0
+        max_latency = max(estimates[m][1] for m in candidates) or 1.0
+        
+        def score(model):
+            cost, latency, error_rate = estimates[model]
+            return (ROUTING_COST_WEIGHT * cost / max_cost
+                    + ROUTING_LATENCY_WEIGHT * latency / max_latency
+                    + ROUTING_ERROR_PENALTY * error_rate)
+        
+        selected = min(candidates, key=score)
+        cost, latency, _ = estimates[selected]
+        baseline_cost = self._estimate(DEFAULT_MODEL, expected_tokens)[0]
+        logger.info(
+            "route question_type=%s difficulty=%s model=%s est_cost=%.5f "
+            "baseline_cost=%.5f est_latency=%.2fs",
+            question_type, difficulty, selected, cost, baseline_cost, latency
+        )
+        return selected
+    
+    def record(self, model: str, latency: float, ok: bool, tokens: int = 0) -> None:
+        """Record the outcome of a completed request that produced `tokens` output tokens"""
+        seconds_per_token = latency / max(tokens, 1)
+        with self._lock:
+            if model not in self._outcomes:
+                self._outcomes[model] = deque(maxlen=ROUTING_WINDOW)
+            self._outcomes[model].append((time.monotonic(), seconds_per_token, ok))
+        logger.info("route_outcome model=%s latency=%.2fs tokens=%d ok=%s", model, latency, tokens, ok)
+
+
+router = ModelRouter()
+
+
+def _resolve_model(model: str, question_type: str, difficulty: str, expected_tokens: int) -> str:
+    """Resolve the requested model, routing automatically when asked to"""
+    if model == AUTO_MODEL:
+        return router.choose(question_type, difficulty, expected_tokens)
+    return model or DEFAULT_MODEL
+
+
+def _timed_completion(model: str, prompt: str, temperature: float, max_tokens: int, **options):
+    """Run a chat completion and feed its latency and outcome to the router"""
+    start = time.perf_counter()
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **options
+        )
+    except Exception:
+        router.record(model, time.perf_counter() - start, ok=False)
+        raise
+    usage = getattr(response, "usage", None)
+    tokens = getattr(usage, "completion_tokens", None) or max_tokens
+    router.record(model, time.perf_counter() - start, ok=True, tokens=tokens)
+    return response
+
+def _build_tech_prompt(tech_stack: str, position: str, experience: int) -> str:
+    """Build the single-candidate technical question prompt"""
+    difficulty = get_difficulty(experience)
     
     # Get role-specific guidance
     role_guidance = ROLE_PROMPTS.get(position.lower(), "Focus on technical proficiency and problem-solving")
     
-    # Use provided model or default
-    selected_model = model or DEFAULT_MODEL
-    
-    prompt = f"""
+    return f"""
     Generate {DEFAULT_TECH_QUESTIONS} technical interview questions for a {position} role with {experience} years of experience.
     Tech stack: {tech_stack}
     Difficulty level: {difficulty}
@@ -47,28 +184,24 @@ def generate_tech_questions(tech_stack: str, position: str = "", experience: int
     
     Format each question on a new line without numbering.
     """
-    
-    try:
-        response = client.chat.completions.create(
-            model=selected_model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=TECH_TEMPERATURE,
-            max_tokens=MAX_TOKENS_TECH
-        )
-        
-        questions = response.choices[0].message.content.strip().split('\n')
-        return [q.strip() for q in questions if q.strip()]
-        
-    except Exception as e:
-        return [f"Error generating questions: {str(e)}"]
 
-def generate_behavioral_questions(position: str = "", experience: int = 0, model: str = None):
-    """Generate behavioral interview questions based on role and experience"""
+def _build_tech_group_prompt(techs: str, count: int, position: str, experience: int) -> str:
+    """Build a short technical prompt covering one group of a larger tech stack"""
+    difficulty = get_difficulty(experience)
+    role_guidance = ROLE_PROMPTS.get(position.lower(), "Focus on technical proficiency and problem-solving")
     
-    # Use provided model or default
-    selected_model = model or DEFAULT_MODEL
+    return f"""
+    Generate {count} technical interview questions for a {position} role with {experience} years of experience.
+    Focus only on: {techs}
+    Difficulty level: {difficulty}
+    Role guidance: {role_guidance}
     
-    prompt = f"""
+    Keep each question to one or two sentences. Format each question on a new line without numbering.
+    """
+
+def _build_behavioral_prompt(position: str, experience: int) -> str:
+    """Build the single-candidate behavioral question prompt"""
+    return f"""
     Generate {DEFAULT_BEHAVIORAL_QUESTIONS} behavioral interview questions for a {position} role with {experience} years of experience.
     
     Focus on:
@@ -80,20 +213,271 @@ def generate_behavioral_questions(position: str = "", experience: int = 0, model
     
     Use the STAR method framework. Format each question on a new line without numbering.
     """
+
+# Prompt builder, temperature and token budget per question type
+GENERATION_SETTINGS = {
+    "technical": (
+        lambda p: _build_tech_prompt(p["tech_stack"], p["position"], p["experience"]),
+        TECH_TEMPERATURE,
+        MAX_TOKENS_TECH
+    ),
+    "technical_group": (
+        lambda p: _build_tech_group_prompt(p["tech_stack"], p["count"], p["position"], p["experience"]),
+        TECH_TEMPERATURE,
+        TECH_FANOUT_MAX_TOKENS
+    ),
+    "behavioral": (
+        lambda p: _build_behavioral_prompt(p["position"], p["experience"]),
+        BEHAVIORAL_TEMPERATURE,
+        MAX_TOKENS_BEHAVIORAL
+    ),
+}
+
+# Question bank pool used when a generation call fails
+BANK_QUESTION_TYPES = {"technical": "technical", "technical_group": "technical", "behavioral": "behavioral"}
+
+def _split_questions(text: str):
+    """Split a completion into one question per non-empty line"""
+    return [q.strip() for q in text.strip().split('\n') if q.strip()]
+
+def _is_configuration_error(error: Exception) -> bool:
+    """Client errors such as a bad API key or model name, which a retry or the bank would only hide"""
+    return isinstance(error, APIStatusError) and 400 <= error.status_code < 500 \
+        and error.status_code not in (408, 409, 429)
+
+def _request_questions(question_type: str, model: str, payload: dict):
+    """Generate questions for one candidate with a single Groq call"""
+    build_prompt, temperature, max_tokens = GENERATION_SETTINGS[question_type]
     
     try:
-        response = client.chat.completions.create(
-            model=selected_model, 
-            messages=[{"role": "user", "content": prompt}],
-            temperature=BEHAVIORAL_TEMPERATURE,
-            max_tokens=MAX_TOKENS_BEHAVIORAL
+        response = _timed_completion(model, build_prompt(payload), temperature, max_tokens)
+        return _split_questions(response.choices[0].message.content)
+        
+    except Exception as e:
+        if _is_configuration_error(e):
+            logger.warning("generation_failed question_type=%s configuration_error=%s", question_type, e)
+            raise
+        # Serve stored questions from the shared bank rather than an error,
+        # marked so the candidate can tell them from generated ones
+        bank_type = BANK_QUESTION_TYPES[question_type]
+        stored = bank_questions(
+            bank_type,
+            [tech.strip() for tech in payload.get("tech_stack", "").split(",") if tech.strip()],
+            payload["position"],
+            get_difficulty(payload["experience"]),
+            payload.get("count", DEFAULT_TECH_QUESTIONS if bank_type == "technical" else DEFAULT_BEHAVIORAL_QUESTIONS)
         )
+        if stored:
+            logger.info("generation_failed question_type=%s served_from_bank=%d error=%s",
+                        question_type, len(stored), e)
+            return [question + BANK_SOURCE_NOTE for question in stored]
+        return [f"Error generating questions: {str(e)}"]
+
+def _split_batched_response(text: str, count: int):
+    """Split a multi-candidate completion into per-candidate question lists"""
+    sections = [None] * count
+    matches = list(BATCH_SECTION_PATTERN.finditer(text))
+    for i, match in enumerate(matches):
+        index = int(match.group(1)) - 1
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        if 0 <= index < count and sections[index] is None:
+            questions = _split_questions(text[match.end():end])
+            sections[index] = questions or None
+    return sections
+
+def _dispatch_batch(key, payloads):
+    """Answer a batch of compatible requests with one structured multi-candidate prompt"""
+    question_type, model = key
+    if len(payloads) == 1:
+        return [_request_questions(question_type, model, payloads[0])]
+    
+    build_prompt, temperature, max_tokens = GENERATION_SETTINGS[question_type]
+    candidates = "\n".join(
+        f"### Candidate {i}\n{build_prompt(payload)}" for i, payload in enumerate(payloads, 1)
+    )
+    prompt = f"""
+    Handle each of the following {len(payloads)} candidate requests independently.
+    
+    {candidates}
+    
+    Respond with one section per candidate. Start each section with a line "### Candidate <number>",
+    followed by that candidate's questions, each on a new line without numbering.
+    """
+    
+    try:
+        # Batch size is capped so every candidate gets its full token budget
+        response = _timed_completion(model, prompt, temperature, max_tokens * len(payloads))
+        sections = _split_batched_response(response.choices[0].message.content, len(payloads))
+    except Exception:
+        sections = [None] * len(payloads)
+    
+    logger.info(
+        "batch question_type=%s model=%s size=%d answered=%d",
+        question_type, model, len(payloads), sum(1 for s in sections if s)
+    )
+    # Candidates the combined answer missed are retried on their own, in parallel
+    retries = {
+        index: _batch_retry_executor.submit(_request_questions, question_type, model, payload)
+        for index, (section, payload) in enumerate(zip(sections, payloads)) if not section
+    }
+    return [
+        retries[index].result() if index in retries else section
+        for index, section in enumerate(sections)
+    ]
+
+# Largest batch whose combined completion still fits GENERATION_BATCH_MAX_TOKENS
+BATCH_MAX_SIZE = max(1, min(
+    GENERATION_BATCH_MAX_SIZE,
+    GENERATION_BATCH_MAX_TOKENS // max(MAX_TOKENS_TECH, MAX_TOKENS_BEHAVIORAL)
+))
+
+_batch_retry_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_SIZE, thread_name_prefix="batch-retry")
+
+batcher = MicroBatcher(
+    _dispatch_batch,
+    window=GENERATION_BATCH_WINDOW_SECONDS,
+    max_wait=GENERATION_BATCH_MAX_WAIT_SECONDS,
+    max_size=BATCH_MAX_SIZE
+)
+
+def _generate(question_type: str, model: str, payload: dict):
+    """Generate questions directly, or through the micro-batcher when enabled"""
+    if GENERATION_BATCHING_ENABLED:
+        return batcher.submit((question_type, model), payload)
+    return _request_questions(question_type, model, payload)
+
+_fanout_executor = ThreadPoolExecutor(max_workers=TECH_FANOUT_WORKERS, thread_name_prefix="tech-fanout")
+
+def _split_tech_groups(techs):
+    """Split a tech stack into at most TECH_FANOUT_MAX_GROUPS similarly sized groups"""
+    group_count = min(TECH_FANOUT_MAX_GROUPS, math.ceil(len(techs) / TECH_FANOUT_GROUP_SIZE))
+    return [techs[i::group_count] for i in range(group_count)]
+
+def _group_quotas(group_count: int, total: int):
+    """Split `total` questions across groups as evenly as possible, earlier groups taking the remainder"""
+    return [total // group_count + (1 if i < total % group_count else 0) for i in range(group_count)]
+
+def _balance_questions(group_results, total: int):
+    """Merge per-group questions round-robin so every group is represented"""
+    merged = []
+    for rank in range(max((len(questions) for questions in group_results), default=0)):
+        for questions in group_results:
+            if rank < len(questions) and len(merged) < total:
+                merged.append(questions[rank])
+    return merged
+
+def stream_tech_questions(techs, position: str, experience: int, model: str):
+    """Generate questions per tech group in parallel, yielding (group index, questions) as each finishes"""
+    groups = _split_tech_groups(techs)
+    # Quotas add up to DEFAULT_TECH_QUESTIONS, so every streamed question is kept in the final set
+    quotas = _group_quotas(len(groups), DEFAULT_TECH_QUESTIONS)
+    
+    futures = {
+        # Groups go straight to Groq; micro-batching them would undo the fan-out
+        _fanout_executor.submit(
+            propagate(_request_questions), "technical_group", model,
+            {"tech_stack": ", ".join(group), "count": quota, "position": position, "experience": experience}
+        ): index
+        for index, (group, quota) in enumerate(zip(groups, quotas)) if quota
+    }
+    for future in as_completed(futures):
+        index = futures[future]
+        questions = [q for q in future.result() if not q.startswith("Error generating questions")]
+        yield index, questions[:quotas[index]]
+
+def generate_tech_questions(tech_stack: str, position: str = "", experience: int = 0, model: str = None,
+                            on_partial=None):
+    """Generate technical interview questions based on tech stack and role
+    
+    Large stacks are fanned out into parallel per-group requests when enabled;
+    `on_partial` is then called with each group's questions as soon as they arrive.
+    """
+    techs = [tech.strip() for tech in tech_stack.split(",") if tech.strip()]
+    
+    if TECH_FANOUT_ENABLED and len(techs) >= TECH_FANOUT_MIN_STACK:
+        selected_model = _resolve_model(model, "technical", get_difficulty(experience), TECH_FANOUT_MAX_TOKENS)
         
-        questions = response.choices[0].message.content.strip().split('\n')
-        return [q.strip() for q in questions if q.strip()]
+        group_results = [[] for _ in _split_tech_groups(techs)]
+        for index, questions in stream_tech_questions(techs, position, experience, selected_model):
+            group_results[index] = questions
+            if on_partial and questions:
+                on_partial(questions)
         
+        merged = _balance_questions(group_results, DEFAULT_TECH_QUESTIONS)
+        if merged:
+            return merged
+    
+    # Use provided model, route automatically, or fall back to default
+    selected_model = _resolve_model(model, "technical", get_difficulty(experience), MAX_TOKENS_TECH)
+    
+    payload = {"tech_stack": tech_stack, "position": position, "experience": experience}
+    return _generate("technical", selected_model, payload)
+
+def generate_behavioral_questions(position: str = "", experience: int = 0, model: str = None):
+    """Generate behavioral interview questions based on role and experience"""
+    
+    # Use provided model, route automatically, or fall back to default
+    selected_model = _resolve_model(model, "behavioral", get_difficulty(experience), MAX_TOKENS_BEHAVIORAL)
+    
+    payload = {"position": position, "experience": experience}
+    return _generate("behavioral", selected_model, payload)
+
+_extraction_cache = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+
+# Retries would multiply the timeout, so the extraction client gets a single attempt
+_extraction_client = client.with_options(max_retries=0, timeout=PROFILE_EXTRACTION_TIMEOUT_SECONDS)
+
+def extract_profile_fields(user_input: str, missing_fields):
+    """Extract profile fields the regex pass missed using a small, fast model
+    
+    Results are cached per normalized input. Errors and timeouts return an
+    empty dict so the conversation simply asks for the details again.
+    """
+    normalized = " ".join(user_input.lower().split())
+    if len(normalized) < 2 or not missing_fields:
+        return {}
+    
+    cache_key = (normalized, tuple(sorted(missing_fields)))
+    with _extraction_cache_lock:
+        if cache_key in _extraction_cache:
+            _extraction_cache.move_to_end(cache_key)
+            return dict(_extraction_cache[cache_key])
+    
+    prompt = f"""
+    Extract these fields from the candidate's message: {", ".join(missing_fields)}.
+    Use "name" for the person's name, "position" for the job role exactly as stated
+    and "experience" for years of experience as an integer.
+    Use null for anything not stated. Reply with a JSON object only.
+    
+    Message: {user_input}
+    """
+    
+    # Called directly rather than through _timed_completion: these tiny calls
+    # would skew the router's per-model stats for question generation
+    start = time.perf_counter()
+    try:
+        response = _extraction_client.chat.completions.create(
+            model=PROFILE_EXTRACTION_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+            max_tokens=PROFILE_EXTRACTION_MAX_TOKENS,
+            response_format={"type": "json_object"}
+        )
+        parsed = json.loads(response.choices[0].message.content)
     except Exception as e:
-        return [f"Error generating questions: {str(e)}"]
+        logger.info("profile_extraction_failed latency=%.3fs error=%s", time.perf_counter() - start, e)
+        return {}
+    logger.info("profile_extraction latency=%.3fs", time.perf_counter() - start)
+    
+    fields = {field: parsed.get(field) for field in missing_fields if parsed.get(field)} \
+        if isinstance(parsed, dict) else {}
+    
+    with _extraction_cache_lock:
+        _extraction_cache[cache_key] = fields
+        if len(_extraction_cache) > PROFILE_EXTRACTION_CACHE_SIZE:
+            _extraction_cache.popitem(last=False)
+    return dict(fields)
 
 def analyze_candidate_fit(tech_stack: str, position: str, experience: int):
     """Analyze how well candidate fits the role"""
@@ -0,0 +1,244 @@
+"""
+Read-only question bank and technology lexicon for TalentScout AI
+Compiled into a compact binary file that every worker process maps with mmap,
+so all processes share one copy through the page cache
+
+File layout (little-endian):
+  header   magic "TSQB" | version u16 | reserved u16 | record count u32 |
+           bucket count u32 | records offset u32 | strings offset u32 | reserved u32
+  buckets  bucket count * (key hash u64 | record offset u32), open addressing,
+           record offset 0 marks an empty bucket
+  records  key offset u32 | key length u32 | value count u32 |
+           value count * (string offset u32 | string length u32)
+  strings  deduplicated UTF-8 string table
+
+Keys are "lexicon|<alias>" for the lexicon and
+"<question type>|<tech>|<role>|<difficulty>" for questions, where "*" matches any.
+
+Usage: python src/question_bank.py [source.json] [output.bin]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import QUESTION_BANK_SOURCE, QUESTION_BANK_PATH, QUESTION_BANK_CHECK_INTERVAL_SECONDS
+
+MAGIC = b"TSQB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIII")
+BUCKET = struct.Struct("<QI")
+RECORD_HEAD = struct.Struct("<III")
+STRING_REF = struct.Struct("<II")
+
+WILDCARD = "*"
+
+# Appended to stored questions served in place of generated ones, and shown as is in the UI
+BANK_SOURCE_NOTE = " _(from the question bank)_"
+
+
+def key_hash(key: str) -> int:
+    """Stable 64-bit hash of a key (Python's hash() differs per process)"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def lexicon_key(alias: str) -> str:
+    return f"lexicon|{alias.strip().lower()}"
+
+
+def question_key(question_type: str, tech: str = WILDCARD, role: str = WILDCARD,
+                 difficulty: str = WILDCARD) -> str:
+    return "|".join(part.strip().lower() for part in (question_type, tech, role, difficulty))
+
+
+def entries_from_source(source: Dict) -> Dict[str, List[str]]:
+    """Turn the JSON source into key -> values entries"""
+    entries: Dict[str, List[str]] = {}
+    for canonical, aliases in source.get("lexicon", {}).items():
+        for alias in [canonical] + aliases:
+            entries[lexicon_key(alias)] = [canonical]
+    for pool in source.get("questions", []):
+        key = question_key(
+            pool["type"],
+            pool.get("tech", WILDCARD),
+            pool.get("role", WILDCARD),
+            pool.get("difficulty", WILDCARD)
+        )
+        entries.setdefault(key, []).extend(pool["questions"])
+    return entries
+
+
+def build_bank(entries: Dict[str, List[str]], path: str) -> None:
+    """Write entries to `path` atomically, so open readers keep their old mapping"""
+    strings = bytearray()
+    string_offsets: Dict[str, int] = {}
+    records = bytearray()
+    record_offsets: Dict[str, int] = {}
+
+    bucket_count = 1
+    while bucket_count < max(1, len(entries)) * 2:
+        bucket_count *= 2
+    records_offset = HEADER.size + bucket_count * BUCKET.size
+
+    # String offsets are absolute, so lay out records first to know their total size
+    records_size = sum(RECORD_HEAD.size + STRING_REF.size * len(values) for values in entries.values())
+    strings_offset = records_offset + records_size
+
+    def intern(value: str):
+        if value not in string_offsets:
+            string_offsets[value] = strings_offset + len(strings)
+            strings.extend(value.encode("utf-8"))
+        return string_offsets[value], len(value.encode("utf-8"))
+
+    for key, values in entries.items():
+        record_offsets[key] = records_offset + len(records)
+        key_off, key_len = intern(key)
+        records.extend(RECORD_HEAD.pack(key_off, key_len, len(values)))
+        for value in values:
+            records.extend(STRING_REF.pack(*intern(value)))
+
+    buckets = [(0, 0)] * bucket_count
+    for key, offset in record_offsets.items():
+        hashed = key_hash(key)
+        slot = hashed & (bucket_count - 1)
+        while buckets[slot][1]:
+            slot = (slot + 1) & (bucket_count - 1)
+        buckets[slot] = (hashed, offset)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), bucket_count, records_offset, strings_offset, 0))
+        for bucket in buckets:
+            f.write(BUCKET.pack(*bucket))
+        f.write(records)
+        f.write(strings)
+    os.replace(tmp_path, path)
+
+
+def build_from_source(source_path: str = QUESTION_BANK_SOURCE, path: str = QUESTION_BANK_PATH) -> None:
+    with open(source_path, encoding="utf-8") as f:
+        build_bank(entries_from_source(json.load(f)), path)
+
+
+class QuestionBank:
+    """Reader over a memory-mapped bank file
+
+    Lookups read the hash table in place and only copy out the strings they return.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.record_count, self._bucket_count, _, _, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"Unsupported question bank file: {path}")
+
+    def is_current(self, path: str) -> bool:
+        """Whether `path` still points at the file this reader mapped"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+        return (stat.st_ino, stat.st_mtime_ns) == (self._stat.st_ino, self._stat.st_mtime_ns)
+
+    def _string(self, offset: int, length: int) -> str:
+        return self._map[offset:offset + length].decode("utf-8")
+
+    def lookup(self, key: str) -> List[str]:
+        """Values stored under `key`, or an empty list"""
+        hashed = key_hash(key)
+        mask = self._bucket_count - 1
+        slot = hashed & mask
+        for _ in range(self._bucket_count):
+            bucket_hash, record_offset = BUCKET.unpack_from(self._map, HEADER.size + slot * BUCKET.size)
+            if not record_offset:
+                return []
+            if bucket_hash == hashed:
+                key_off, key_len, count = RECORD_HEAD.unpack_from(self._map, record_offset)
+                if self._string(key_off, key_len) == key:
+                    refs = record_offset + RECORD_HEAD.size
+                    return [
+                        self._string(*STRING_REF.unpack_from(self._map, refs + i * STRING_REF.size))
+                        for i in range(count)
+                    ]
+            slot = (slot + 1) & mask
+        return []
+
+    def close(self) -> None:
+        self._map.close()
+
+
+_bank: Optional[QuestionBank] = None
+_bank_checked_at = 0.0
+_bank_lock = threading.Lock()
+
+
+def get_bank() -> Optional[QuestionBank]:
+    """The shared bank, remapped when the file has been rebuilt; None if unavailable"""
+    global _bank, _bank_checked_at
+
+    now = time.monotonic()
+    if _bank is not None and now - _bank_checked_at < QUESTION_BANK_CHECK_INTERVAL_SECONDS:
+        return _bank
+
+    with _bank_lock:
+        _bank_checked_at = now
+        if _bank is not None and _bank.is_current(QUESTION_BANK_PATH):
+            return _bank
+        try:
+            if not os.path.exists(QUESTION_BANK_PATH) and os.path.exists(QUESTION_BANK_SOURCE):
+                build_from_source()
+            # The previous mapping is left for the garbage collector, since other
+            # threads may still be reading from it
+            _bank = QuestionBank(QUESTION_BANK_PATH)
+        except (OSError, ValueError):
+            _bank = None
+        return _bank
+
+
+def canonical_tech(name: str) -> str:
+    """Canonical display name for a technology alias, or the name unchanged"""
+    bank = get_bank()
+    if bank is None:
+        return name
+    values = bank.lookup(lexicon_key(name))
+    return values[0] if values else name
+
+
+def bank_questions(question_type: str, techs: List[str], role: str, difficulty: str, limit: int) -> List[str]:
+    """Stored questions for the most specific matching pools, up to `limit`"""
+    bank = get_bank()
+    if bank is None:
+        return []
+
+    questions: List[str] = []
+    for tech in list(techs) + [WILDCARD]:
+        for key in (
+            question_key(question_type, tech, role or WILDCARD, difficulty),
+            question_key(question_type, tech, WILDCARD, difficulty),
+            question_key(question_type, tech, WILDCARD, WILDCARD),
+        ):
+            for question in bank.lookup(key):
+                if question not in questions:
+                    questions.append(question)
+                    if len(questions) >= limit:
+                        return questions
+    return questions
+
+
+if __name__ == "__main__":
+    source_path = sys.argv[1] if len(sys.argv) > 1 else QUESTION_BANK_SOURCE
+    output_path = sys.argv[2] if len(sys.argv) > 2 else QUESTION_BANK_PATH
+    build_from_source(source_path, output_path)
+    print(f"Wrote {output_path}")
@@ -0,0 +1,164 @@
+"""
+Resume ingestion for TalentScout AI
+Streams pasted or uploaded resume text through single-pass line extractors
+that fill the candidate profile in one turn
+"""
+
+import codecs
+import re
+from collections import Counter
+from typing import BinaryIO, Iterator, List, Tuple, Union
+
+from config import MAX_TECH_STACK_ITEMS, RESUME_CHUNK_SIZE, RESUME_HEADER_LINES, RESUME_MAX_LINE_CHARS
+from candidate import CandidateProfile, EMAIL_PATTERN, EXPERIENCE_PATTERNS, ROLE_KEYWORDS, TECH_PATTERNS
+from question_bank import canonical_tech
+
+LABELLED_NAME_PATTERN = re.compile(r'^\s*(?:full\s+)?name\s*[:\-]\s*(.+)$', re.IGNORECASE)
+HEADER_NAME_PATTERN = re.compile(r"^([A-Z][a-zA-Z'\-]+(?:\s+[A-Z][a-zA-Z'\-]+){1,2})$")
+LABELLED_ROLE_PATTERN = re.compile(
+    r'^\s*(?:title|role|position|current\s+role|desired\s+(?:role|position)|job\s+title|applying\s+for)\s*[:\-]\s*(.+)$',
+    re.IGNORECASE
+)
+TRIGGER_ROLE_PATTERN = re.compile(r'(?:applying for|role of|position of|as a|as an)\s+([^,.!?|]+)', re.IGNORECASE)
+HEADER_ROLE_PATTERN = re.compile(r'^([A-Za-z\s]{0,40}' + ROLE_KEYWORDS + r')\b', re.IGNORECASE)
+PLUS_YEARS_PATTERN = re.compile(r'(?<!\d)(\d{1,2})\s{0,3}\+\s{0,3}(?:years?|yrs?)')
+
+NON_NAME_HEADINGS = {'resume', 'curriculum vitae', 'cv', 'profile', 'summary', 'contact'}
+
+
+def iter_text_chunks(source: Union[str, BinaryIO], chunk_size: int = RESUME_CHUNK_SIZE) -> Iterator[str]:
+    """Yield text chunks from a pasted string or an uploaded binary file"""
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        yield decoder.decode(data)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(chunks: Iterator[str], max_chars: int = RESUME_MAX_LINE_CHARS) -> Iterator[str]:
+    """Re-split streamed chunks into lines of at most `max_chars`, carrying partial lines across chunks"""
+    remainder = ""
+    for chunk in chunks:
+        lines = (remainder + chunk).split("\n")
+        remainder = lines.pop()
+        for line in lines:
+            yield from _split_long_line(line, max_chars)
+        # A line with no newline in sight is emitted in pieces rather than buffered
+        while len(remainder) > max_chars:
+            yield remainder[:max_chars]
+            remainder = remainder[max_chars:]
+    if remainder:
+        yield remainder
+
+
+def _split_long_line(line: str, max_chars: int) -> Iterator[str]:
+    for start in range(0, max(len(line), 1), max_chars):
+        yield line[start:start + max_chars]
+
+
+class ResumeExtractor:
+    """Single-pass extractor for name, email, role, years and tech stack"""
+
+    def __init__(self):
+        self.name = ""
+        self.email = ""
+        self.position = ""
+        self.experience = 0
+        self.tech_counts = Counter()
+        self._header_lines_seen = 0
+
+    def feed_line(self, line: str) -> None:
+        """Extract whatever the line contributes to the profile"""
+        line = line.strip()
+        if not line:
+            return
+        line_lower = line.lower()
+        in_header = self._header_lines_seen < RESUME_HEADER_LINES
+        self._header_lines_seen += 1
+
+        if not self.email:
+            match = EMAIL_PATTERN.search(line)
+            if match:
+                self.email = match.group()
+
+        if not self.name:
+            self._extract_name(line, in_header)
+
+        if not self.position:
+            self._extract_role(line, in_header)
+
+        # Keep the largest stated figure, e.g. "7+ years" over "2 years with Django"
+        if "year" in line_lower or "yr" in line_lower:
+            for pattern in EXPERIENCE_PATTERNS + [PLUS_YEARS_PATTERN]:
+                for match in pattern.finditer(line_lower):
+                    years = int(match.group(1))
+                    if 0 <= years <= 50 and years > self.experience:
+                        self.experience = years
+
+        for pattern in TECH_PATTERNS:
+            for tech in pattern.findall(line_lower):
+                self.tech_counts[canonical_tech(tech)] += 1
+
+    def _extract_name(self, line: str, in_header: bool) -> None:
+        match = LABELLED_NAME_PATTERN.match(line)
+        if match:
+            self.name = match.group(1).strip()[:50]
+            return
+        if in_header and line.lower() not in NON_NAME_HEADINGS:
+            match = HEADER_NAME_PATTERN.match(line)
+            if match and not re.search(ROLE_KEYWORDS, line, re.IGNORECASE):
+                self.name = match.group(1)
+
+    def _extract_role(self, line: str, in_header: bool) -> None:
+        match = LABELLED_ROLE_PATTERN.match(line) or TRIGGER_ROLE_PATTERN.search(line)
+        if not match and in_header:
+            match = HEADER_ROLE_PATTERN.match(line)
+        if match:
+            role = match.group(1).strip()
+            if 3 <= len(role) <= 50:
+                self.position = role.title()
+
+    def tech_stack(self) -> List[str]:
+        """Most frequently mentioned technologies, ties in order of first mention"""
+        return [tech for tech, _ in self.tech_counts.most_common(MAX_TECH_STACK_ITEMS)]
+
+    def apply_to(self, profile: CandidateProfile) -> CandidateProfile:
+        """Fill empty profile fields with what was extracted"""
+        if not profile.name and self.name:
+            profile.name = self.name
+        if not profile.email and self.email:
+            profile.email = self.email
+        if not profile.position and self.position:
+            profile.position = self.position
+        if not profile.experience and self.experience:
+            profile.experience = self.experience
+        if not profile.tech_stack:
+            profile.tech_stack = self.tech_stack()
+        return profile
+
+
+def ingest_resume(source: Union[str, BinaryIO], profile: CandidateProfile) -> Tuple[CandidateProfile, List[str]]:
+    """Stream a resume through the extractors and fill the candidate profile"""
+    extractor = ResumeExtractor()
+    for line in iter_lines(iter_text_chunks(source)):
+        extractor.feed_line(line)
+
+    profile = extractor.apply_to(profile)
+
+    issues = []
+    if not profile.name:
+        issues.append("Please provide your name")
+    if not profile.email:
+        issues.append("Please provide your email address")
+    if not profile.position:
+        issues.append("Please specify the job position/role")
+    return profile, issues
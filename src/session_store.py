@@ -0,0 +1,221 @@
+"""
+Session persistence for TalentScout AI
+Stores compact binary snapshots of in-progress sessions so candidates can
+resume after a dyno restart instead of starting the onboarding over
+"""
+
+import json
+import os
+import re
+import secrets
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import SESSION_STORE_DIR, SESSION_TTL_SECONDS, SESSION_PURGE_INTERVAL_SECONDS
+
+# Snapshot layout (all integers big-endian):
+#   magic "TSS" | version u8 | state str | experience u16 |
+#   name str | email str | position str | question_type str |
+#   tech count u16 | tech str * n | question count u16 | (type str, question str) * n
+# where "str" is a u16 byte length followed by UTF-8 bytes.
+SNAPSHOT_MAGIC = b"TSS"
+SNAPSHOT_VERSION = 1
+
+# History is an append-only file of u32 length-prefixed JSON messages
+HISTORY_RECORD = struct.Struct(">I")
+
+_TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+_U16 = struct.Struct(">H")
+
+
+def new_session_token() -> str:
+    """Create a new resumable session token"""
+    return secrets.token_urlsafe(16)
+
+
+def is_valid_token(token: str) -> bool:
+    """Check a token is safe to use as a file name"""
+    return bool(token) and bool(_TOKEN_PATTERN.match(token))
+
+
+def _session_path(token: str, suffix: str) -> str:
+    if not is_valid_token(token):
+        raise ValueError("Invalid session token")
+    return os.path.join(SESSION_STORE_DIR, f"{token}.{suffix}")
+
+
+def _pack_str(value: str) -> bytes:
+    data = (value or "").encode("utf-8")[:0xFFFF]
+    return _U16.pack(len(data)) + data
+
+
+def _unpack_str(data: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = _U16.unpack_from(data, offset)
+    offset += _U16.size
+    return data[offset:offset + length].decode("utf-8", errors="ignore"), offset + length
+
+
+def encode_snapshot(profile, state_value: str, questions: List[Dict[str, str]]) -> bytes:
+    """Encode a CandidateProfile, conversation state value and generated questions"""
+    parts = [
+        SNAPSHOT_MAGIC,
+        bytes([SNAPSHOT_VERSION]),
+        _pack_str(state_value),
+        _U16.pack(max(0, min(int(profile.experience or 0), 0xFFFF))),
+        _pack_str(profile.name),
+        _pack_str(profile.email),
+        _pack_str(profile.position),
+        _pack_str(profile.question_type),
+        _U16.pack(len(profile.tech_stack)),
+    ]
+    parts.extend(_pack_str(tech) for tech in profile.tech_stack)
+    parts.append(_U16.pack(len(questions)))
+    for q_data in questions:
+        parts.append(_pack_str(q_data.get("type", "General")))
+        parts.append(_pack_str(q_data.get("question", "")))
+    return b"".join(parts)
+
+
+def decode_snapshot(data: bytes) -> Tuple[Dict, str, List[Dict[str, str]]]:
+    """Decode a snapshot into (profile fields, state value, questions)"""
+    if data[:3] != SNAPSHOT_MAGIC:
+        raise ValueError("Not a session snapshot")
+    version = data[3]
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+
+    offset = 4
+    state_value, offset = _unpack_str(data, offset)
+    (experience,) = _U16.unpack_from(data, offset)
+    offset += _U16.size
+
+    fields = []
+    for _ in range(4):
+        value, offset = _unpack_str(data, offset)
+        fields.append(value)
+    name, email, position, question_type = fields
+
+    (tech_count,) = _U16.unpack_from(data, offset)
+    offset += _U16.size
+    tech_stack = []
+    for _ in range(tech_count):
+        tech, offset = _unpack_str(data, offset)
+        tech_stack.append(tech)
+
+    (question_count,) = _U16.unpack_from(data, offset)
+    offset += _U16.size
+    questions = []
+    for _ in range(question_count):
+        q_type, offset = _unpack_str(data, offset)
+        question, offset = _unpack_str(data, offset)
+        questions.append({"type": q_type, "question": question})
+
+    profile_fields = {
+        "name": name,
+        "email": email,
+        "position": position,
+        "experience": experience,
+        "tech_stack": tech_stack,
+        "question_type": question_type
+    }
+    return profile_fields, state_value, questions
+
+
+def save_snapshot(token: str, profile, state_value: str, questions: List[Dict[str, str]]) -> None:
+    """Atomically write the session snapshot to disk"""
+    os.makedirs(SESSION_STORE_DIR, exist_ok=True)
+    path = _session_path(token, "snap")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_snapshot(profile, state_value, questions))
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(token: str) -> Optional[Tuple[Dict, str, List[Dict[str, str]]]]:
+    """Load a session snapshot, or None if missing or unreadable"""
+    try:
+        with open(_session_path(token, "snap"), "rb") as f:
+            return decode_snapshot(f.read())
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def append_history(token: str, messages: List[Dict[str, str]]) -> None:
+    """Append new conversation messages to the session history log"""
+    if not messages:
+        return
+    os.makedirs(SESSION_STORE_DIR, exist_ok=True)
+    records = []
+    for message in messages:
+        payload = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        records.append(HISTORY_RECORD.pack(len(payload)) + payload)
+    with open(_session_path(token, "hist"), "ab") as f:
+        f.write(b"".join(records))
+
+
+def load_history(token: str) -> List[Dict[str, str]]:
+    """Load the full conversation history, ignoring a torn trailing record"""
+    try:
+        with open(_session_path(token, "hist"), "rb") as f:
+            data = f.read()
+    except (OSError, ValueError):
+        return []
+
+    history = []
+    offset = 0
+    while offset + HISTORY_RECORD.size <= len(data):
+        (length,) = HISTORY_RECORD.unpack_from(data, offset)
+        start = offset + HISTORY_RECORD.size
+        if start + length > len(data):
+            break
+        try:
+            history.append(json.loads(data[start:start + length].decode("utf-8")))
+        except ValueError:
+            break
+        offset = start + length
+    return history
+
+
+def delete_session(token: str) -> None:
+    """Remove all stored data for a session"""
+    for suffix in ("snap", "hist"):
+        try:
+            os.remove(_session_path(token, suffix))
+        except (OSError, ValueError):
+            pass
+
+
+_last_purge = 0.0
+_purge_lock = threading.Lock()
+
+
+def purge_expired_sessions(max_age: float = SESSION_TTL_SECONDS) -> int:
+    """Delete session files not written to for `max_age` seconds; returns the count"""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        names = os.listdir(SESSION_STORE_DIR)
+    except OSError:
+        return 0
+    for name in names:
+        path = os.path.join(SESSION_STORE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def maybe_purge_expired_sessions() -> None:
+    """Run purge_expired_sessions at most once per purge interval per process"""
+    global _last_purge
+    now = time.monotonic()
+    with _purge_lock:
+        if _last_purge and now - _last_purge < SESSION_PURGE_INTERVAL_SECONDS:
+            return
+        _last_purge = now
+    purge_expired_sessions()
@@ -0,0 +1,268 @@
+"""
+Transcript recording and offline replay for TalentScout AI
+Records every chat turn, plus actions that change state outside the chat
+(resume import, step reset, background generation finishing or being
+interrupted), to an append-only JSONL log and replays recorded
+traffic through the conversation state machine with LLM responses served
+from the recording
+
+Usage: python src/transcripts.py transcripts.jsonl
+"""
+
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+from dataclasses import asdict
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional
+
+from admission import CapacityExceeded
+from config import TRANSCRIPT_LOG_PATH
+from candidate import CandidateProfile
+from conversation import ConversationManager, ConversationState
+from chat_flow import process_user_input
+
+TRANSCRIPT_VERSION = 3
+
+# Turns driven by a chat message; any other action is replayed from its recorded outcome
+MESSAGE_ACTION = "message"
+
+
+def profile_delta(before: Dict, after: Dict) -> Dict:
+    """Fields of the profile that changed during a turn"""
+    return {field: value for field, value in after.items() if before.get(field) != value}
+
+
+class RecordedTurn:
+    """Collects the LLM calls and outcome of one turn while it runs"""
+
+    def __init__(self, session, user_input: str, action: str = MESSAGE_ACTION):
+        self.session = session
+        self.user_input = user_input
+        self.action = action
+        # Outcome of handing generation to a background job, if the turn did
+        self.generation: Optional[Dict] = None
+        self.state_before = session.conversation_state.value
+        self.profile_before = asdict(session.candidate_profile)
+        self.llm_calls: List[Dict] = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+
+    def wrap(self, kind: str, generator: Callable) -> Callable:
+        """Wrap an LLM-backed callable so its arguments, result and timing are recorded"""
+        def recorded(*args):
+            start = time.perf_counter()
+            result = generator(*args)
+            self.llm_calls.append({
+                "kind": kind,
+                "args": list(args),
+                "response": result if isinstance(result, dict) else list(result),
+                "latency": round(time.perf_counter() - start, 4)
+            })
+            return result
+        return recorded
+
+    def to_record(self, response: str) -> Dict:
+        profile_after = asdict(self.session.candidate_profile)
+        return {
+            "version": TRANSCRIPT_VERSION,
+            "session": self.session.get("session_token", ""),
+            "ts": self.started_at,
+            "action": self.action,
+            "input": self.user_input,
+            "state_before": self.state_before,
+            "state_after": self.session.conversation_state.value,
+            "profile_before": self.profile_before,
+            "profile_delta": profile_delta(self.profile_before, profile_after),
+            "llm_calls": self.llm_calls,
+            "generation": self.generation,
+            "response": response,
+            "duration": round(time.perf_counter() - self._start, 4)
+        }
+
+
+class TranscriptRecorder:
+    """Appends one JSON line per recorded turn; a no-op without a log path"""
+
+    def __init__(self, path: str = TRANSCRIPT_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def start_turn(self, session, user_input: str, action: str = MESSAGE_ACTION) -> RecordedTurn:
+        return RecordedTurn(session, user_input, action)
+
+    def finish_turn(self, turn: RecordedTurn, response: str) -> None:
+        if not self.enabled:
+            return
+        line = json.dumps(turn.to_record(response), ensure_ascii=False) + "\n"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+recorder = TranscriptRecorder()
+
+
+def read_transcripts(path: str) -> Iterator[Dict]:
+    """Yield recorded turns, skipping a torn trailing line"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class _ReplaySession(SimpleNamespace):
+    """Stand-in for st.session_state during replay"""
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
+def _recorded_generator(calls: List[Dict], kind: str, strict: bool = True) -> Callable:
+    """Serve recorded LLM responses of one kind, in order
+
+    Non-strict generators answer an unrecorded call with an empty result, so
+    extraction changes that add a fallback call show up as mismatches rather
+    than aborting the replay.
+    """
+    pending = [call for call in calls if call["kind"] == kind]
+
+    def generator(*args):
+        if not pending:
+            if strict:
+                raise RuntimeError(f"No recorded {kind} response for this turn")
+            return {}
+        return copy.deepcopy(pending.pop(0)["response"])
+    return generator
+
+
+def _recorded_hand_off(generation: Optional[Dict]) -> Optional[Callable]:
+    """Reproduce a recorded background hand-off, including a capacity rejection"""
+    if not generation:
+        return None
+
+    def start_generation(question_types):
+        if generation.get("status") == "rejected":
+            raise CapacityExceeded(generation["retry_after"])
+    return start_generation
+
+
+def _seed_session(session: _ReplaySession, record: Dict) -> None:
+    """Set the session to the state and profile the record started from"""
+    session.conversation_state = ConversationState(record["state_before"])
+    session.candidate_profile = CandidateProfile(**copy.deepcopy(record["profile_before"]))
+
+
+def _apply_recorded_outcome(session: _ReplaySession, record: Dict) -> None:
+    """Apply the recorded effect of a non-message action such as a resume import"""
+    session.conversation_state = ConversationState(record["state_after"])
+    for field, value in record.get("profile_delta", {}).items():
+        setattr(session.candidate_profile, field, copy.deepcopy(value))
+
+
+def replay(records: List[Dict]) -> Dict:
+    """Drive recorded turns back through the state machine and compare outcomes
+
+    Sessions are seeded from their first record. If a later record starts
+    from a state or profile the replay did not reach, for example after an
+    unrecorded action in an older log, the session is re-seeded from that
+    record and the turn is reported as drift rather than as a mismatch.
+    """
+    conv_manager = ConversationManager()
+    sessions: Dict[str, _ReplaySession] = {}
+    mismatches = []
+    drifted = []
+    turns = 0
+
+    start = time.perf_counter()
+    for record in records:
+        token = record.get("session", "")
+        session = sessions.get(token)
+        if session is None:
+            session = _ReplaySession(session_token=token, conversation_history=[], generated_questions=[])
+            _seed_session(session, record)
+            sessions[token] = session
+        elif (session.conversation_state.value != record["state_before"]
+              or asdict(session.candidate_profile) != record["profile_before"]):
+            drifted.append({"session": token, "input": record["input"]})
+            _seed_session(session, record)
+
+        if record.get("action", MESSAGE_ACTION) != MESSAGE_ACTION:
+            _apply_recorded_outcome(session, record)
+            continue
+
+        # Turns that handed generation to a background job replay the hand-off only;
+        # the job's result follows as its own generation_complete record
+        start_generation = _recorded_hand_off(record.get("generation"))
+
+        profile_before = asdict(session.candidate_profile)
+        response = process_user_input(
+            conv_manager,
+            session,
+            record["input"],
+            None,
+            _recorded_generator(record["llm_calls"], "technical"),
+            _recorded_generator(record["llm_calls"], "behavioral"),
+            _recorded_generator(record["llm_calls"], "profile", strict=False),
+            start_generation
+        )
+        turns += 1
+
+        outcome = {
+            "state_after": session.conversation_state.value,
+            "profile_delta": profile_delta(profile_before, asdict(session.candidate_profile)),
+            "response": response
+        }
+        differences = [key for key, value in outcome.items() if record.get(key) != value]
+        if differences:
+            mismatches.append({
+                "session": token,
+                "input": record["input"],
+                "fields": differences
+            })
+    elapsed = time.perf_counter() - start
+
+    return {
+        "sessions": len(sessions),
+        "turns": turns,
+        "seconds": elapsed,
+        "turns_per_second": turns / elapsed if elapsed else float("inf"),
+        "mismatches": mismatches,
+        "drifted": drifted
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded TalentScout transcripts")
+    parser.add_argument("path", help="Transcript JSONL log to replay")
+    parser.add_argument("--show", type=int, default=10, help="Number of mismatches to print")
+    args = parser.parse_args()
+
+    report = replay(list(read_transcripts(args.path)))
+    print(f"Replayed {report['turns']} turns from {report['sessions']} sessions "
+          f"in {report['seconds']:.3f}s ({report['turns_per_second']:.0f} turns/s)")
+    print(f"Mismatched turns: {len(report['mismatches'])}")
+    if report["drifted"]:
+        print(f"Re-seeded after unrecorded state changes: {len(report['drifted'])}")
+    for mismatch in report["mismatches"][:args.show]:
+        print(f"  [{mismatch['session'][:8]}] {mismatch['input']!r}: {', '.join(mismatch['fields'])}")
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
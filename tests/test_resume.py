@@ -0,0 +1,38 @@
+"""Regression tests for resume ingestion"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from candidate import CandidateProfile  # noqa: E402
+from config import RESUME_MAX_BYTES  # noqa: E402
+from resume import ResumeExtractor, ingest_resume, iter_lines  # noqa: E402
+
+# Quadratic backtracking took 83s on 40K digits; linear matching takes milliseconds,
+# so this limit only catches a regression, not a slow CI machine
+LINEAR_TIME_LIMIT_SECONDS = 10.0
+
+
+def test_extractor_is_linear_on_long_digit_line():
+    extractor = ResumeExtractor()
+    start = time.perf_counter()
+    extractor.feed_line("1" * 100_000 + " years of experience")
+    assert time.perf_counter() - start < LINEAR_TIME_LIMIT_SECONDS
+
+
+def test_ingest_is_linear_on_max_size_digit_input():
+    start = time.perf_counter()
+    ingest_resume("1" * RESUME_MAX_BYTES + " years of experience", CandidateProfile())
+    assert time.perf_counter() - start < LINEAR_TIME_LIMIT_SECONDS
+
+
+def test_long_lines_are_split():
+    lines = list(iter_lines(iter(["a" * 2500 + "\nshort"]), max_chars=1024))
+    assert [len(line) for line in lines] == [1024, 1024, 452, 5]
+
+
+def test_experience_still_extracted():
+    profile, _ = ingest_resume("Jane Doe\n7+ years building services\n2 years with Django", CandidateProfile())
+    assert profile.experience == 7